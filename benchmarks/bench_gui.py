@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Time the Library page under the offscreen Qt platform.
+
+    python benchmarks/bench_gui.py --output gui.json
+    python benchmarks/bench_gui.py --baseline gui.json
+
+For each synthetic library size this measures how long ``scan_finished``
+takes to fill an empty grid and to reconcile a full one, the time per frame
+of a scripted scroll from top to bottom and back, and the time
+``WallpaperDelegate.paint`` spends per card. Results use the same JSON
+format and baseline comparison as ``bench_library.py``.
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+
+from bench_library import REPO_DIR, isolate_environment, measure, add_common_arguments, report_results
+
+WINDOW_WAIT_SECONDS = 120
+
+
+def wait_until(app, condition, timeout=WINDOW_WAIT_SECONDS):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError("Timed out waiting for the GUI")
+        app.processEvents()
+        time.sleep(0.005)
+
+
+def scripted_scroll(grid):
+    """Scroll the grid top to bottom and back, painting every step; returns the frame count."""
+    bar = grid.verticalScrollBar()
+    step = max(1, grid.viewport().height() // 4)
+    positions = list(range(0, bar.maximum() + 1, step)) + [bar.maximum()]
+    positions += positions[::-1]
+    for value in positions:
+        bar.setValue(value)
+        grid.viewport().repaint()
+    return len(positions)
+
+
+def run_size(app, size, repeat, home, paint_times):
+    from generate_library import generate_library
+    import library
+    import wallpaper_gui
+
+    workshop = generate_library(home, size)
+    results = {}
+
+    def record(name, func):
+        results[f"{name}/{size}"] = dict(measure(func, repeat), size=size)
+
+    window = wallpaper_gui.WallpaperApp()
+    window.show()
+    # Let the startup scan fill the grid and the thumbnail cache on disk
+    wait_until(app, lambda: window.btn_scan.isEnabled() and window.list_wallpapers.count() == size)
+    scan_result = wallpaper_gui.scan_and_cache_library()
+    grid = window.list_wallpapers
+
+    def populate():
+        grid.clear()
+        window.thumbnail_cache.clear()
+        wallpapers, is_append, scanned_dirs, refreshed = scan_result
+        window.scan_finished((list(wallpapers), is_append, scanned_dirs, refreshed))
+        app.processEvents()
+
+    record("populate", populate)
+    record("reconcile", lambda: window.scan_finished(
+        (list(scan_result[0]), False, scan_result[2], set())))
+
+    frame_times = []
+    del paint_times[:]
+    for _ in range(repeat):
+        start = time.perf_counter()
+        frames = scripted_scroll(grid)
+        frame_times.append((time.perf_counter() - start) * 1000 / frames)
+    results[f"scroll_frame/{size}"] = {
+        "min_ms": round(min(frame_times), 4),
+        "median_ms": round(statistics.median(frame_times), 4),
+        "fps": round(1000 / statistics.median(frame_times), 1),
+        "frames": frames,
+        "repeat": repeat,
+        "size": size,
+    }
+    if paint_times:
+        results[f"paint_card/{size}"] = {
+            "min_ms": round(min(paint_times), 4),
+            "median_ms": round(statistics.median(paint_times), 4),
+            "cards": len(paint_times),
+            "size": size,
+        }
+
+    window.release_timer.stop()
+    window.watcher.stop()
+    window.instance_server.close()
+    window.tray.hide()
+    window.hide()
+    window.deleteLater()
+    app.processEvents()
+    shutil.rmtree(workshop)
+    shutil.rmtree(library.CACHE_DIR, ignore_errors=True)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark populating, scrolling and painting the library grid")
+    add_common_arguments(parser)
+    args = parser.parse_args(argv)
+
+    home = tempfile.mkdtemp(prefix="wpe-bench-gui-")
+    isolate_environment(home)
+    sys.path[:0] = [REPO_DIR, os.path.dirname(os.path.abspath(__file__))]
+    from PyQt6.QtWidgets import QApplication
+    import wallpaper_gui
+
+    app = QApplication(sys.argv[:1])
+    app.setQuitOnLastWindowClosed(False)
+    app.setStyle("Fusion")
+
+    # Time every card the delegate paints
+    paint_times = []
+    original_paint = wallpaper_gui.WallpaperDelegate.paint
+
+    def timed_paint(self, painter, option, index):
+        start = time.perf_counter()
+        original_paint(self, painter, option, index)
+        paint_times.append((time.perf_counter() - start) * 1000)
+
+    wallpaper_gui.WallpaperDelegate.paint = timed_paint
+
+    results = {}
+    try:
+        for size in (int(s) for s in args.sizes.split(",")):
+            print(f"Running {size} items...", file=sys.stderr)
+            results.update(run_size(app, size, args.repeat, home, paint_times))
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+    return report_results(results, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
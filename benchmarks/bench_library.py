@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""Time the library code on synthetic libraries of increasing size.
+
+    python benchmarks/bench_library.py --output results.json
+    python benchmarks/bench_library.py --baseline benchmarks/baseline.json
+
+Covers the scan (with the thumbnail cache cold and warm), both sort modes,
+the search and facet filters and parsing of ``linux-wallpaperengine -l`` output at 100,
+1k and 10k items. Results are written as JSON; with ``--baseline`` every
+benchmark's fastest run is compared to the stored one and the script exits
+with status 1 if one got slower than the tolerance allows.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SIZES = (100, 1000, 10000)
+FILTER_QUERIES = ("night", "10000001", "no such wallpaper")
+
+
+def isolate_environment(home):
+    """Point $HOME and the XDG dirs at ``home`` before the repo modules load."""
+    os.environ["HOME"] = home
+    for var, sub in (("XDG_CONFIG_HOME", ".config"), ("XDG_CACHE_HOME", ".cache"),
+                     ("XDG_STATE_HOME", ".local/state")):
+        os.environ[var] = os.path.join(home, sub)
+    os.environ["XDG_RUNTIME_DIR"] = os.path.join(home, "run")
+    os.makedirs(os.environ["XDG_RUNTIME_DIR"], mode=0o700, exist_ok=True)
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def time_calls(func, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - start) * 1000 / number
+
+
+def measure(func, repeat, min_sample_ms=20.0):
+    """Time ``func`` ``repeat`` times; returns per-call min/median in ms.
+
+    Fast functions are called in a loop per sample, like timeit's autorange,
+    so each sample is long enough to be compared between runs. One-shot
+    measurements (``repeat == 1``) are never looped.
+    """
+    number = 1
+    if repeat > 1:
+        while number < 100000 and time_calls(func, number) * number < min_sample_ms:
+            number *= 10
+    times = [time_calls(func, number) for _ in range(repeat)]
+    return {
+        "min_ms": round(min(times), 4),
+        "median_ms": round(statistics.median(times), 4),
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def properties_text(count):
+    lines = ["Running with: linux-wallpaperengine", "Properties:"]
+    for i in range(count):
+        lines.append(f"option{i} - slider")
+        lines.append(f"\tValue: {i % 100}")
+    return "\n".join(lines)
+
+
+def properties_json(count):
+    return json.dumps([{"name": f"option{i}", "value": i % 100} for i in range(count)])
+
+
+def run_size(size, repeat, home):
+    from generate_library import generate_library
+    import library
+    import process_manager
+    import wallpaper_gui
+
+    workshop = generate_library(home, size)
+    results = {}
+
+    def record(name, func, times=repeat):
+        results[f"{name}/{size}"] = dict(measure(func, times), size=size)
+
+    # The first scan writes every thumbnail, later ones only check them
+    record("scan_cold", wallpaper_gui.scan_and_cache_library, times=1)
+    record("scan_warm", wallpaper_gui.scan_and_cache_library)
+    record("scan_library", library.scan_library)
+
+    wallpapers, _, _ = library.scan_library()
+    record("sort_name", lambda: library.sort_wallpapers(list(wallpapers), library.SORT_NAME))
+    record("sort_subscription_date",
+           lambda: library.sort_wallpapers(list(wallpapers), library.SORT_SUBSCRIPTION_DATE))
+    record("filter", lambda: [library.filter_wallpapers(wallpapers, q) for q in FILTER_QUERIES])
+    facets = library.FacetIndex()
+    for w in wallpapers:
+        facets.add(w)
+    record("filter_facets",
+           lambda: [facets.matching(q, {library.FACET_TYPE: "scene"}) for q in FILTER_QUERIES])
+
+    text, text_json = properties_text(size), properties_json(size)
+    record("parse_properties_text", lambda: process_manager.parse_properties_output(text))
+    record("parse_properties_json", lambda: process_manager.parse_properties_output(text_json))
+
+    shutil.rmtree(workshop)
+    shutil.rmtree(library.CACHE_DIR, ignore_errors=True)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Print each benchmark's change against ``baseline``; returns the regressions."""
+    regressions = []
+    print(f"{'benchmark':<36} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, current in results.items():
+        old = baseline.get(name)
+        # The minimum is the least noisy figure on a busy machine
+        if old is None or not old["min_ms"]:
+            print(f"{name:<36} {'-':>12} {current['min_ms']:>10.2f}ms")
+            continue
+        ratio = current["min_ms"] / old["min_ms"]
+        flag = "  REGRESSION" if ratio > 1 + tolerance else ""
+        print(f"{name:<36} {old['min_ms']:>10.2f}ms {current['min_ms']:>10.2f}ms {ratio:>7.2f}x{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def add_common_arguments(parser):
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated library sizes (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark (default: %(default)s)")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against results saved by an earlier --output")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown against the baseline, as a fraction (default: %(default)s)")
+
+
+def report_results(results, args):
+    """Write, print and compare ``results``; returns the exit status."""
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    else:
+        for name, result in results.items():
+            print(f"{name:<36} {result['min_ms']:>10.2f}ms")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark library scanning, sorting, filtering and parsing")
+    add_common_arguments(parser)
+    args = parser.parse_args(argv)
+
+    home = tempfile.mkdtemp(prefix="wpe-bench-")
+    isolate_environment(home)
+    sys.path[:0] = [REPO_DIR, os.path.dirname(os.path.abspath(__file__))]
+    # QImage needs an application object for its image format plugins
+    from PyQt6.QtGui import QGuiApplication
+    app = QGuiApplication(sys.argv[:1])
+
+    results = {}
+    try:
+        for size in (int(s) for s in args.sizes.split(",")):
+            print(f"Running {size} items...", file=sys.stderr)
+            results.update(run_size(size, args.repeat, home))
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+    status = report_results(results, args)
+    del app
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""Write a synthetic Wallpaper Engine workshop tree for benchmarks.
+
+Each item gets a ``project.json`` shaped like the ones Steam downloads, a
+preview image in one of the formats and sizes seen in real libraries and a
+small stand-in for its main file (scene.pkg, video or web page).
+"""
+
+import os
+import sys
+import json
+import random
+import struct
+import argparse
+
+from PIL import Image
+
+WORKSHOP_SUBDIR = os.path.join(".local", "share", "Steam", "steamapps", "workshop", "content", "431960")
+
+PREVIEW_FORMATS = (
+    ("preview.gif", "GIF"),
+    ("preview.jpg", "JPEG"),
+    ("preview.png", "PNG"),
+)
+PREVIEW_SIZES = ((256, 144), (400, 225), (640, 360), (1280, 720))
+RESOLUTIONS = ((3840, 2160), (2560, 1440), (1920, 1080), (1280, 720), (1080, 1920))
+TYPES = ("scene", "video", "web")
+TAGS = ("Anime", "Nature", "Landscape", "Game", "Sci-Fi", "Abstract", "Pixel art", "Music")
+WORDS = ("night", "city", "forest", "rain", "neon", "ocean", "sunset", "winter",
+         "space", "dragon", "lofi", "cherry", "blossom", "cyber", "mountain", "lake")
+
+
+def make_project(rng, item_id, preview):
+    wallpaper_type = rng.choice(TYPES)
+    properties = {
+        "schemecolor": {"order": 0, "text": "ui_browse_properties_scheme_color", "type": "color", "value": "0.1 0.2 0.3"},
+    }
+    for i in range(rng.randint(0, 6)):
+        properties[f"option{i}"] = {"order": i + 1, "text": f"Option {i}", "type": "slider",
+                                    "min": 0, "max": 100, "value": rng.randint(0, 100)}
+    return {
+        "contentrating": rng.choice(("Everyone", "Questionable", "Mature")),
+        "description": " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 30))),
+        "file": {"scene": "scene.json", "video": "video.mp4", "web": "index.html"}[wallpaper_type],
+        "general": {"properties": properties},
+        "preview": preview,
+        "tags": rng.sample(TAGS, rng.randint(1, 3)),
+        "title": " ".join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(1, 5))),
+        "type": wallpaper_type,
+        "version": rng.randint(0, 5),
+        "workshopid": item_id,
+    }
+
+
+def build_package(files):
+    """Bytes of a scene.pkg holding ``files``, a list of ``(name, data)``."""
+    table = b""
+    payload = b""
+    for name, data in files:
+        encoded = name.encode("utf-8")
+        table += struct.pack("<I", len(encoded)) + encoded + struct.pack("<II", len(payload), len(data))
+        payload += data
+    return struct.pack("<I", 8) + b"PKGV0001" + struct.pack("<I", len(files)) + table + payload
+
+
+def box(box_type, payload):
+    return struct.pack(">I", 8 + len(payload)) + box_type + payload
+
+
+def build_mp4(width, height, media):
+    """Bytes of a minimal MP4 with one video track of ``width`` x ``height``."""
+    matrix = struct.pack(">9I", 0x10000, 0, 0, 0, 0x10000, 0, 0, 0, 0x40000000)
+    # Version 0 track header: flags, times, id, duration, layer/group/volume, matrix, size
+    tkhd = (struct.pack(">I5I", 0x000003, 0, 0, 1, 0, 0) + bytes(8) + struct.pack(">hhhh", 0, 0, 0, 0)
+            + matrix + struct.pack(">II", width << 16, height << 16))
+    moov = box(b"moov", box(b"trak", box(b"tkhd", tkhd)))
+    return box(b"ftyp", b"isom" + struct.pack(">I", 512) + b"isomavc1") + moov + box(b"mdat", media)
+
+
+def write_main_file(rng, path, project):
+    width, height = rng.choice(RESOLUTIONS)
+    if project["type"] == "scene":
+        scene = json.dumps({"camera": {"center": "0 0 -1", "eye": "0 0 0", "up": "0 1 0"},
+                            "general": {"orthogonalprojection": {"width": width, "height": height}},
+                            "objects": [{"image": "models/background.json", "name": "background"}]})
+        texture = rng.randbytes(rng.randint(1, 64) * 1024)
+        files = [("scene.json", scene.encode("utf-8")), ("materials/background.tex", texture)]
+        with open(os.path.join(path, "scene.pkg"), "wb") as f:
+            f.write(build_package(files))
+    elif project["type"] == "video":
+        with open(os.path.join(path, project["file"]), "wb") as f:
+            f.write(build_mp4(width, height, rng.randbytes(rng.randint(1, 64) * 1024)))
+    else:
+        with open(os.path.join(path, project["file"]), "w", encoding="utf-8") as f:
+            f.write(f"<!DOCTYPE html><title>{project['title']}</title>\n")
+
+
+def generate_library(home, count, seed=0):
+    """Create ``count`` items under ``home``'s Steam workshop dir; returns that dir."""
+    rng = random.Random(seed)
+    workshop = os.path.join(home, WORKSHOP_SUBDIR)
+    os.makedirs(workshop, exist_ok=True)
+    images = {}
+    for n in range(count):
+        item_id = str(1000000000 + n)
+        path = os.path.join(workshop, item_id)
+        os.makedirs(path, exist_ok=True)
+        preview, fmt = rng.choice(PREVIEW_FORMATS)
+        size = rng.choice(PREVIEW_SIZES)
+        # Encoding is the slow part; vary the colour over a small set of images
+        key = (fmt, size, n % 8)
+        if key not in images:
+            image = Image.new("RGB", size, (n * 37 % 256, n * 91 % 256, n * 53 % 256))
+            tmp_path = os.path.join(workshop, f".template-{len(images)}")
+            image.save(tmp_path, fmt)
+            with open(tmp_path, "rb") as f:
+                images[key] = f.read()
+            os.unlink(tmp_path)
+        with open(os.path.join(path, preview), "wb") as f:
+            f.write(images[key])
+        project = make_project(rng, item_id, preview)
+        with open(os.path.join(path, "project.json"), "w", encoding="utf-8") as f:
+            json.dump(project, f, indent=4)
+        write_main_file(rng, path, project)
+    return workshop
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a fake workshop library")
+    parser.add_argument("home", help="Directory used as $HOME for the library")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    print(generate_library(args.home, args.count, args.seed))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import atexit
+import pathlib
+import logging
+import sqlite3
+import threading
+
+CONFIG_FILE = pathlib.Path(os.getenv("XDG_CONFIG_HOME", os.path.expanduser("~/.config"))) / "linux-wallpaperengine-gui" / "wpe_gui_config.json"
+SETTINGS_DB = CONFIG_FILE.parent / "wallpapers.sqlite3"
+
+
+def read_config(path=CONFIG_FILE):
+    """Read the GUI config, returning {} when it is missing or unreadable."""
+    if not os.path.exists(path):
+        return {}
+    logging.info("Attempting to read config from: %s", path)
+    try:
+        with open(path, 'r') as f:
+            config = json.load(f)
+        return config if isinstance(config, dict) else {}
+    except Exception as e:
+        logging.info("Failed to open config with error %s", e)
+        return {}
+
+
+def write_config(data, path=CONFIG_FILE):
+    """Atomically replace ``path`` with the serialized config ``data``."""
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class ConfigStore:
+    """Debounced write-behind for the config file.
+
+    save() serializes the config right away, so the caller may keep mutating
+    it, and a background thread writes the newest snapshot once no save has
+    come in for ``delay`` seconds. flush() writes anything pending now and
+    waits for it; it also runs at interpreter exit.
+    """
+
+    def __init__(self, path=CONFIG_FILE, delay=0.5):
+        self.path = path
+        self.delay = delay
+        self._cond = threading.Condition()
+        self._pending = None
+        self._deadline = 0.0
+        self._flushing = False
+        self._writing = False
+        self._closed = False
+        self._thread = None
+        atexit.register(self.close)
+
+    def save(self, config):
+        data = json.dumps(config, indent=4)
+        with self._cond:
+            if self._closed:
+                # Too late for the writer thread; don't lose the change
+                self._write(data)
+                return
+            self._pending = data
+            self._deadline = time.monotonic() + self.delay
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="config-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def flush(self, timeout=5.0):
+        """Write pending changes now; returns False if that didn't finish in ``timeout``."""
+        with self._cond:
+            if self._thread is None:
+                return True
+            self._flushing = True
+            self._cond.notify_all()
+            done = self._cond.wait_for(lambda: self._pending is None and not self._writing, timeout)
+            self._flushing = False
+            return done
+
+    def close(self):
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _run(self):
+        with self._cond:
+            while True:
+                if self._pending is None:
+                    if self._closed:
+                        return
+                    self._cond.wait()
+                    continue
+                remaining = self._deadline - time.monotonic()
+                if remaining > 0 and not self._flushing and not self._closed:
+                    self._cond.wait(remaining)
+                    continue
+                data, self._pending = self._pending, None
+                self._writing = True
+                self._cond.release()
+                try:
+                    self._write(data)
+                finally:
+                    self._cond.acquire()
+                    self._writing = False
+                    self._cond.notify_all()
+
+    def _write(self, data):
+        try:
+            write_config(data, self.path)
+        except Exception as e:
+            logging.error("Couldn't save config with error %s", e)
+
+
+class WallpaperSettingsStore:
+    """Per-wallpaper properties and launch options, one SQLite row per wallpaper.
+
+    Replaces the ``properties_by_wallpaper`` and ``launch_options_by_wallpaper``
+    maps of the JSON config, so looking up or saving one wallpaper doesn't
+    depend on how many have been configured. ``legacy`` is a config dict that
+    may still hold those maps (not migrated yet); it is consulted for ids
+    missing from the database.
+    """
+
+    def __init__(self, path=SETTINGS_DB, legacy=None):
+        self.path = path
+        self.legacy = legacy or {}
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            pathlib.Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            # Shared by the daemon's handler threads; every use holds _lock
+            conn = sqlite3.connect(str(self.path), timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS wallpaper_settings ("
+                " id TEXT PRIMARY KEY,"
+                " properties TEXT,"
+                " launch_options TEXT,"
+                " updated REAL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _get(self, wallpaper_id, column):
+        with self._lock:
+            try:
+                row = self._connect().execute(
+                    f"SELECT {column} FROM wallpaper_settings WHERE id = ?", (str(wallpaper_id),)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logging.error("Failed to read wallpaper settings from %s: %s", self.path, e)
+                row = None
+        if row is not None and row[0] is not None:
+            return json.loads(row[0])
+        return self.legacy.get(f"{column}_by_wallpaper", {}).get(str(wallpaper_id))
+
+    def properties(self, wallpaper_id):
+        return self._get(wallpaper_id, "properties") or {}
+
+    def launch_options(self, wallpaper_id):
+        return self._get(wallpaper_id, "launch_options")
+
+    def save(self, wallpaper_id, properties=None, launch_options=None):
+        """Store the given settings of one wallpaper; None leaves a field as it is."""
+        with self._lock:
+            try:
+                with self._connect() as conn:
+                    conn.execute(
+                        "INSERT INTO wallpaper_settings (id, properties, launch_options, updated)"
+                        " VALUES (?, ?, ?, ?)"
+                        " ON CONFLICT(id) DO UPDATE SET"
+                        " properties = COALESCE(excluded.properties, properties),"
+                        " launch_options = COALESCE(excluded.launch_options, launch_options),"
+                        " updated = excluded.updated",
+                        (
+                            str(wallpaper_id),
+                            json.dumps(properties) if properties is not None else None,
+                            json.dumps(launch_options) if launch_options is not None else None,
+                            time.time(),
+                        ),
+                    )
+            except sqlite3.Error as e:
+                logging.error("Failed to save wallpaper settings to %s: %s", self.path, e)
+
+    def migrate_from_config(self, config):
+        """Move the per-wallpaper maps out of ``config`` into the database.
+
+        Returns True if ``config`` was changed and needs to be saved.
+        """
+        properties = config.get("properties_by_wallpaper") or {}
+        options = config.get("launch_options_by_wallpaper") or {}
+        if not properties and not options:
+            changed = "properties_by_wallpaper" in config or "launch_options_by_wallpaper" in config
+            config.pop("properties_by_wallpaper", None)
+            config.pop("launch_options_by_wallpaper", None)
+            return changed
+        now = time.time()
+        rows = [
+            (
+                str(wallpaper_id),
+                json.dumps(properties[wallpaper_id]) if wallpaper_id in properties else None,
+                json.dumps(options[wallpaper_id]) if wallpaper_id in options else None,
+                now,
+            )
+            for wallpaper_id in set(properties) | set(options)
+        ]
+        with self._lock:
+            try:
+                with self._connect() as conn:
+                    # Rows already in the database are newer than the JSON copy
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO wallpaper_settings (id, properties, launch_options, updated)"
+                        " VALUES (?, ?, ?, ?)",
+                        rows,
+                    )
+            except sqlite3.Error as e:
+                logging.error("Failed to migrate wallpaper settings to %s: %s", self.path, e)
+                return False
+        logging.info("Migrated settings of %d wallpapers to %s", len(rows), self.path)
+        config.pop("properties_by_wallpaper", None)
+        config.pop("launch_options_by_wallpaper", None)
+        return True
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
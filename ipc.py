@@ -0,0 +1,80 @@
+import os
+import json
+import errno
+import pathlib
+import socket
+
+# Per-user runtime directory for the local control sockets
+RUNTIME_DIR = (
+    pathlib.Path(os.environ["XDG_RUNTIME_DIR"]) / "linux-wallpaperengine-gui"
+    if os.getenv("XDG_RUNTIME_DIR")
+    else pathlib.Path(f"/tmp/linux-wallpaperengine-gui-{os.getuid()}")
+)
+DAEMON_SOCKET = RUNTIME_DIR / "daemon.sock"
+# Listened on by the running GUI so a second launch can hand over to it
+GUI_SOCKET = RUNTIME_DIR / "gui.sock"
+
+
+def ensure_runtime_dir():
+    RUNTIME_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+    return RUNTIME_DIR
+
+
+def encode_message(message):
+    # One JSON document per line
+    return (json.dumps(message) + "\n").encode("utf-8")
+
+
+def decode_message(line):
+    message = json.loads(line.decode("utf-8"))
+    if not isinstance(message, dict):
+        raise ValueError("Expected a JSON object")
+    return message
+
+
+def send_request(socket_path, request, timeout=2.0):
+    """Send one request over a Unix socket and return the decoded reply.
+
+    Raises OSError when nothing is listening on ``socket_path``.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(socket_path))
+        sock.sendall(encode_message(request))
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            if chunk.endswith(b"\n"):
+                break
+    data = b"".join(chunks)
+    if not data:
+        raise ConnectionError(f"No reply from {socket_path}")
+    return decode_message(data)
+
+
+def is_listening(socket_path):
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(0.5)
+            sock.connect(str(socket_path))
+        return True
+    except OSError:
+        return False
+
+
+def is_stale(socket_path):
+    """Whether nobody listens on ``socket_path``, so it may be removed and reused.
+
+    Only a refused or missing socket counts: one that accepts but is slow to
+    answer belongs to a live process.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(0.5)
+            sock.connect(str(socket_path))
+        return False
+    except OSError as e:
+        return e.errno in (errno.ECONNREFUSED, errno.ENOENT)
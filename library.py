@@ -0,0 +1,435 @@
+import os
+import glob
+import json
+import re
+import hashlib
+import pathlib
+import subprocess
+import logging
+import threading
+import collections
+
+import tracing
+
+CACHE_DIR = pathlib.Path(
+    os.getenv("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+) / "linux-wallpaperengine-gui"
+LIBRARY_INDEX = CACHE_DIR / "library.json"
+THUMBNAIL_DIR = CACHE_DIR / "thumbnails"
+LIBRARY_INDEX_VERSION = 1
+
+SORT_NAME = "Name"
+SORT_SUBSCRIPTION_DATE = "Subscription Date"
+SORT_SIZE = "Size"
+
+FACET_TYPE = "type"
+FACET_RATING = "contentrating"
+FACET_TAG = "tag"
+FACET_RESOLUTION = "resolution"
+FACETS = (FACET_TYPE, FACET_RATING, FACET_TAG, FACET_RESOLUTION)
+# Resolution facet values, by the shorter side of the wallpaper
+RESOLUTION_CLASSES = (("4K", 2160), ("1440p", 1440), ("1080p", 1080), ("720p", 720), ("SD", 0))
+
+
+def get_steam_workshop_dirs():
+    workshop_dirs = set()
+    base_paths = [
+        os.path.expanduser("~/.local/share/Steam"),
+        os.path.expanduser("~/.steam/steam"),
+        os.path.expanduser("~/.var/app/com.valvesoftware.Steam/.local/share/Steam"),
+        os.path.expanduser("~/.var/app/com.valvesoftware.Steam/.data/Steam"),
+        os.path.expanduser("~/.var/app/com.valvesoftware.Steam/.steam/steam"),
+    ]
+
+    # Library folders from VDF
+    lib_configs = [
+        os.path.expanduser("~/.local/share/Steam/steamapps/libraryfolders.vdf"),
+        os.path.expanduser("~/.steam/steam/steamapps/libraryfolders.vdf"),
+        os.path.expanduser("~/.var/app/com.valvesoftware.Steam/.local/share/Steam/steamapps/libraryfolders.vdf")
+    ]
+
+    for cfg in lib_configs:
+        if os.path.isfile(cfg):
+            try:
+                with open(cfg, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                    # Simple regex to find paths in VDF
+                    paths = re.findall(r'"path"\s+"([^"]+)"', content)
+                    for p in paths:
+                        if os.path.isdir(p):
+                            base_paths.append(p)
+            except: pass
+
+    # Deduplicate
+    base_paths = list(set(base_paths))
+
+    # Add Snap paths
+    base_paths.extend(glob.glob(os.path.expanduser("~/snap/steam/*/.local/share/Steam")))
+    base_paths.extend(glob.glob(os.path.expanduser("~/snap/steam/*/.steam/steam")))
+
+    for base in base_paths:
+        if not os.path.exists(base): continue
+
+        # Standard workshop path for Wallpaper Engine (ID: 431960)
+        p_workshop = os.path.join(base, "steamapps/workshop/content/431960")
+        if os.path.isdir(p_workshop):
+            workshop_dirs.add(p_workshop)
+
+        # Default assets
+        p_presets = os.path.join(base, "steamapps/common/wallpaper_engine/assets/presets")
+        if os.path.isdir(p_presets):
+            workshop_dirs.add(p_presets)
+
+    # Fallback deep scan if nothing found
+    if not workshop_dirs:
+        try:
+            # Limit search to home directory to avoid scanning whole system
+            search_roots = [os.path.expanduser("~")]
+            cmd = ["find"] + search_roots + ["-maxdepth", "6", "-type", "d", "-name", "431960"]
+            result = subprocess.run(cmd, capture_output=True, text=True, stderr=subprocess.DEVNULL)
+            if result.returncode == 0:
+                for line in result.stdout.splitlines():
+                    if os.path.isdir(line):
+                        workshop_dirs.add(line)
+        except Exception as e:
+            logging.error(f"Deep scan error: {e}")
+
+    return workshop_dirs
+
+
+def discover_library_dirs(manual_dir=None):
+    """Return ``(workshop_dirs, is_append)``; ``manual_dir`` is scanned on top of the workshop."""
+    with tracing.span("discover_workshop_dirs") as span:
+        workshop_dirs = get_steam_workshop_dirs()
+        span.set(dirs=len(workshop_dirs))
+    is_append = manual_dir is not None
+    if manual_dir:
+        workshop_dirs.add(manual_dir)
+    return list(workshop_dirs), is_append
+
+
+def scan_library(manual_dir=None):
+    """Scan the workshop directories (plus ``manual_dir``) for wallpapers.
+
+    Returns ``(wallpapers, is_append, scanned_dirs)``; this module has no Qt
+    dependency so the daemon and benchmarks can use it too.
+    """
+    workshop_dirs, is_append = discover_library_dirs(manual_dir)
+
+    wallpapers = []
+    seen = set()
+
+    for w_dir in workshop_dirs:
+        with tracing.span("parse_project_files", dir=w_dir) as span:
+            scan_workshop_dir(w_dir, wallpapers, seen)
+            span.set(total=len(wallpapers))
+
+    return wallpapers, is_append, workshop_dirs
+
+
+def iter_library(workshop_dirs, batch_size=64):
+    """Yield ``(batch, folders_left)`` while reading the wallpapers in ``workshop_dirs``.
+
+    Every directory is listed up front so ``folders_left`` counts the
+    candidate folders not read yet. The last batch, with 0 left, may be empty.
+    """
+    entries = []
+    for w_dir in workshop_dirs:
+        entries.extend(workshop_entries(w_dir))
+    seen = set()
+    batch = []
+    for n, (item_id, path) in enumerate(entries, 1):
+        if item_id in seen:
+            continue
+        wallpaper = read_wallpaper(item_id, path)
+        if wallpaper is None:
+            continue
+        seen.add(item_id)
+        batch.append(wallpaper)
+        if len(batch) >= batch_size:
+            yield batch, len(entries) - n
+            batch = []
+    yield batch, 0
+
+
+def workshop_entries(w_dir):
+    """``(item_id, path)`` of the folders in ``w_dir`` that may hold a wallpaper.
+
+    ``w_dir`` itself comes first, for a manually picked wallpaper folder.
+    """
+    try:
+        names = os.listdir(w_dir)
+    except OSError:
+        return []
+    entries = []
+    if "project.json" in names:
+        entries.append((os.path.basename(w_dir), w_dir))
+    entries.extend((name, os.path.join(w_dir, name)) for name in names)
+    return entries
+
+
+def read_wallpaper(item_id, path):
+    """The library entry for the wallpaper folder ``path``, or None if it has no valid project.json."""
+    try:
+        with open(os.path.join(path, "project.json"), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    tags = data.get("tags")
+    return {
+        "title": data.get("title", "Untitled"),
+        "id": item_id,
+        "path": path,
+        "preview": data.get("preview"),
+        "type": str(data.get("type") or "").lower() or None,
+        "file": data.get("file"),
+        "contentrating": data.get("contentrating"),
+        "tags": [t for t in tags if isinstance(t, str)] if isinstance(tags, list) else [],
+    }
+
+
+def scan_workshop_dir(w_dir, wallpapers, seen):
+    """Append the wallpapers found in ``w_dir`` to ``wallpapers``, skipping ids in ``seen``."""
+    for item_id, path in workshop_entries(w_dir):
+        if item_id in seen: continue
+        wallpaper = read_wallpaper(item_id, path)
+        if wallpaper is not None:
+            wallpapers.append(wallpaper)
+            seen.add(item_id)
+
+
+def sort_wallpapers(wallpapers, mode, reverse=False, sizes=None):
+    """Sort ``wallpapers`` in place by ``mode`` (SORT_NAME, SORT_SUBSCRIPTION_DATE or SORT_SIZE).
+
+    SORT_SIZE orders by ``sizes``, a ``{path: bytes}`` map; unmeasured
+    folders count as empty.
+    """
+    if mode == SORT_NAME:
+        wallpapers.sort(key=lambda x: x["title"].lower(), reverse=reverse)
+    elif mode == SORT_SUBSCRIPTION_DATE:
+        # By default needs to be reversed to get the latest subscriptions
+        wallpapers.sort(key=lambda x: pathlib.Path(x["path"]).stat().st_ctime, reverse=not reverse)
+    elif mode == SORT_SIZE:
+        # Largest first
+        sizes = sizes or {}
+        wallpapers.sort(key=lambda x: sizes.get(x["path"], 0), reverse=not reverse)
+
+
+def wallpaper_matches(wallpaper, query):
+    """Whether the lower-cased ``query`` occurs in the title or id of ``wallpaper``."""
+    return query in wallpaper["title"].lower() or query in str(wallpaper.get("id", "")).lower()
+
+
+def resolution_class(resolution):
+    if not resolution:
+        return None
+    short_side = min(resolution)
+    for name, minimum in RESOLUTION_CLASSES:
+        if short_side >= minimum:
+            return name
+    return None
+
+
+def facet_values(wallpaper):
+    """``{facet: [values]}`` of ``wallpaper``; None stands for unknown."""
+    return {
+        FACET_TYPE: [wallpaper.get("type")],
+        FACET_RATING: [wallpaper.get("contentrating")],
+        FACET_TAG: wallpaper.get("tags") or [None],
+        FACET_RESOLUTION: [resolution_class(wallpaper.get("resolution"))],
+    }
+
+
+class FacetIndex:
+    """Ids of the wallpapers for every facet value, plus their search text.
+
+    Filters on several facets are set intersections, so they stay cheap
+    however often the search text changes.
+    """
+
+    def __init__(self):
+        self.ids = {facet: collections.defaultdict(set) for facet in FACETS}
+        self.search_text = {}
+        self.values = {}
+
+    def add(self, wallpaper):
+        item_id = wallpaper["id"]
+        self.remove(item_id)
+        values = facet_values(wallpaper)
+        for facet, facet_vals in values.items():
+            for value in facet_vals:
+                self.ids[facet][value].add(item_id)
+        self.values[item_id] = values
+        self.search_text[item_id] = f"{wallpaper['title']}\n{item_id}".lower()
+
+    def remove(self, item_id):
+        values = self.values.pop(item_id, None)
+        if values is None:
+            return
+        for facet, facet_vals in values.items():
+            for value in facet_vals:
+                ids = self.ids[facet][value]
+                ids.discard(item_id)
+                if not ids:
+                    del self.ids[facet][value]
+        del self.search_text[item_id]
+
+    def clear(self):
+        for ids in self.ids.values():
+            ids.clear()
+        self.search_text.clear()
+        self.values.clear()
+
+    def counts(self, facet):
+        """``{value: number of wallpapers}`` for ``facet``."""
+        return {value: len(ids) for value, ids in self.ids[facet].items()}
+
+    def matching(self, query="", selected=None):
+        """Ids matching the lower-cased ``query`` and every ``{facet: value}`` in ``selected``.
+
+        Returns None when nothing filters, meaning every wallpaper matches.
+        """
+        result = None
+        for facet, value in (selected or {}).items():
+            ids = self.ids[facet].get(value, set())
+            result = set(ids) if result is None else result & ids
+        if query:
+            candidates = self.search_text if result is None else result
+            result = {i for i in candidates if query in self.search_text[i]}
+        return result
+
+    def matches(self, wallpaper, query="", selected=None):
+        """Whether one wallpaper passes the same filters as ``matching``."""
+        if query and not wallpaper_matches(wallpaper, query):
+            return False
+        values = facet_values(wallpaper)
+        return all(value in values[facet] for facet, value in (selected or {}).items())
+
+
+def filter_wallpapers(wallpapers, text):
+    query = text.lower()
+    return [w for w in wallpapers if wallpaper_matches(w, query)]
+
+
+def load_library_index(path=LIBRARY_INDEX):
+    """Return the wallpapers saved by the last full scan, or [] if there is none."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        return []
+    except Exception as e:
+        logging.info("Failed to read library index %s: %s", path, e)
+        return []
+    if not isinstance(index, dict) or index.get("version") != LIBRARY_INDEX_VERSION:
+        return []
+    wallpapers = index.get("wallpapers")
+    return wallpapers if isinstance(wallpapers, list) else []
+
+
+def save_library_index(wallpapers, scanned_dirs, path=LIBRARY_INDEX):
+    index = {
+        "version": LIBRARY_INDEX_VERSION,
+        "dirs": sorted(scanned_dirs),
+        "wallpapers": wallpapers,
+    }
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Overlapping scans each write their own temp file; the last rename wins
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logging.error("Failed to write %s: %s", path, e)
+
+
+def preview_path(wallpaper):
+    if not wallpaper.get("preview"):
+        return None
+    return os.path.join(wallpaper["path"], wallpaper["preview"])
+
+
+def thumbnail_path(wallpaper):
+    """Cache location of the scaled preview of ``wallpaper`` (may not exist yet)."""
+    source = preview_path(wallpaper)
+    if source is None:
+        return None
+    digest = hashlib.sha1(source.encode("utf-8", "surrogateescape")).hexdigest()
+    return THUMBNAIL_DIR / f"{digest}.png"
+
+
+def is_thumbnail_fresh(wallpaper):
+    thumb = thumbnail_path(wallpaper)
+    if thumb is None:
+        return False
+    try:
+        return thumb.stat().st_mtime >= os.stat(preview_path(wallpaper)).st_mtime
+    except OSError:
+        return False
+
+
+def wallpaper_files(wallpaper):
+    """Files the backend reads first when loading ``wallpaper``: project.json, its main file and scene.pkg."""
+    project = os.path.join(wallpaper["path"], "project.json")
+    files = [project]
+    try:
+        with open(project, 'r', encoding='utf-8') as f:
+            main = json.load(f).get("file")
+    except (OSError, ValueError, AttributeError):
+        main = None
+    # For scenes the main file is scene.json inside scene.pkg
+    if isinstance(main, str) and main:
+        files.append(os.path.join(wallpaper["path"], main))
+    files.append(os.path.join(wallpaper["path"], "scene.pkg"))
+    return [f for f in dict.fromkeys(files) if os.path.isfile(f)]
+
+
+def prewarm_files(paths, max_bytes=256 * 2**20, chunk=2 * 2**20):
+    """Ask the kernel to start reading ``paths`` into the page cache.
+
+    posix_fadvise(WILLNEED) queues readahead and returns without waiting for
+    it. The kernel only honours one readahead window per call, so files are
+    hinted in ``chunk``-sized pieces. At most ``max_bytes`` are requested in
+    total; returns how many were.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return 0
+    total = 0
+    for path in paths:
+        budget = max_bytes - total
+        if budget <= 0:
+            break
+        try:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                length = min(os.fstat(fd).st_size, budget)
+                for offset in range(0, length, chunk):
+                    os.posix_fadvise(fd, offset, min(chunk, length - offset), os.POSIX_FADV_WILLNEED)
+                total += length
+            finally:
+                os.close(fd)
+        except OSError as e:
+            logging.debug("Failed to prewarm %s: %s", path, e)
+    return total
+
+
+def prune_thumbnails(wallpapers):
+    """Delete cached thumbnails that no wallpaper in ``wallpapers`` refers to."""
+    keep = {thumbnail_path(w).name for w in wallpapers if w.get("preview")}
+    try:
+        names = os.listdir(THUMBNAIL_DIR)
+    except FileNotFoundError:
+        return 0
+    removed = 0
+    for name in names:
+        # .tmp files belong to a scan that is still writing them
+        if name not in keep and not name.endswith(".tmp"):
+            try:
+                os.unlink(THUMBNAIL_DIR / name)
+                removed += 1
+            except OSError:
+                pass
+    return removed
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""Disk usage and duplicate detection for the wallpaper library.
+
+    python library_analysis.py [extra folders...] [--top 20] [--json]
+
+Every wallpaper folder in the Steam library folders (plus the given ones)
+is measured in a thread pool. Folders with the same file count and size
+are then hashed, file by file, to find identical copies; a folder whose
+size is unique can't have a duplicate and is never read. File digests are
+cached by path, size and mtime, so a rerun only hashes what changed.
+
+Scans keep one wallpaper per workshop id, so this walks the folders itself
+rather than using the library index: the same item subscribed in two
+Steam libraries is exactly the duplicate worth finding.
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from library import CACHE_DIR, discover_library_dirs, workshop_entries, read_wallpaper
+
+ANALYSIS_CACHE = CACHE_DIR / "analysis.json"
+ANALYSIS_CACHE_VERSION = 1
+HASH_CHUNK = 1 << 20
+
+
+def default_workers():
+    return min(8, os.cpu_count() or 4)
+
+
+def measure_folder(path):
+    """Return ``(files, disk_bytes)`` for the folder ``path``.
+
+    ``files`` lists ``(relative_path, size, mtime_ns)`` of its regular
+    files; ``disk_bytes`` is the space allocated to the folder, as du counts
+    it. Symlinks are neither followed nor hashed.
+    """
+    files = []
+    disk = 0
+    seen_inodes = set()
+    stack = [path]
+    while stack:
+        folder = stack.pop()
+        try:
+            entries = list(os.scandir(folder))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            # Hard links take their space once
+            if (st.st_dev, st.st_ino) in seen_inodes:
+                continue
+            seen_inodes.add((st.st_dev, st.st_ino))
+            disk += st.st_blocks * 512
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                files.append((os.path.relpath(entry.path, path), st.st_size, st.st_mtime_ns))
+    files.sort()
+    return files, disk
+
+
+def disk_usage(path):
+    """Bytes allocated on disk to the folder ``path``."""
+    return measure_folder(path)[1]
+
+
+def file_digest(path, token=None):
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK):
+            if token is not None:
+                token.check()
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class DigestCache:
+    """File digests keyed by path, valid while the file's size and mtime match."""
+
+    def __init__(self, path=ANALYSIS_CACHE):
+        self.path = path
+        self.entries = {}
+        self.lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict) and data.get("version") == ANALYSIS_CACHE_VERSION:
+                self.entries = data.get("files") or {}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.info("Failed to read analysis cache %s: %s", path, e)
+
+    def get(self, path, size, mtime_ns):
+        with self.lock:
+            entry = self.entries.get(path)
+        if entry and entry[0] == size and entry[1] == mtime_ns:
+            return entry[2]
+        return None
+
+    def put(self, path, size, mtime_ns, digest):
+        with self.lock:
+            self.entries[path] = [size, mtime_ns, digest]
+
+    def save(self, keep):
+        """Write the cache, dropping files that aren't in ``keep`` any more."""
+        with self.lock:
+            self.entries = {p: e for p, e in self.entries.items() if p in keep}
+            data = {"version": ANALYSIS_CACHE_VERSION, "files": self.entries}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logging.error("Failed to write %s: %s", self.path, e)
+
+
+def library_folders(dirs):
+    """``(item_id, path)`` of every wallpaper folder in ``dirs``, keeping same-id copies."""
+    folders = {}
+    for w_dir in dirs:
+        for item_id, path in workshop_entries(w_dir):
+            if os.path.isfile(os.path.join(path, "project.json")):
+                folders.setdefault(os.path.realpath(path), (item_id, path))
+    return list(folders.values())
+
+
+def measure_item(item_id, path):
+    files, disk = measure_folder(path)
+    wallpaper = read_wallpaper(item_id, path)
+    return {
+        "id": item_id,
+        "path": path,
+        "title": wallpaper["title"] if wallpaper else item_id,
+        "size": disk,
+        "apparent_size": sum(size for _, size, _ in files),
+        "files": files,
+        "digest": None,
+    }
+
+
+def hash_item(item, cache, token=None):
+    """Digest of the folder's content: every file's relative path and digest."""
+    digest = hashlib.blake2b(digest_size=20)
+    for relpath, size, mtime_ns in item["files"]:
+        path = os.path.join(item["path"], relpath)
+        file_hash = cache.get(path, size, mtime_ns)
+        if file_hash is None:
+            file_hash = file_digest(path, token)
+            cache.put(path, size, mtime_ns, file_hash)
+        digest.update(f"{relpath}\0{file_hash}\n".encode("utf-8", "surrogateescape"))
+    return digest.hexdigest()
+
+
+def run_parallel(executor, func, args_list, token, report, stage):
+    """Run ``func(*args)`` for every entry of ``args_list``; results in order."""
+    futures = {executor.submit(func, *args): n for n, args in enumerate(args_list)}
+    results = [None] * len(args_list)
+    last_report = time.monotonic()
+    try:
+        for done, future in enumerate(as_completed(futures), 1):
+            if token is not None:
+                token.check()
+            try:
+                results[futures[future]] = future.result()
+            except OSError as e:
+                logging.debug("Library analysis skipped an item: %s", e)
+            if report is not None and (done == len(futures) or time.monotonic() - last_report >= 0.1):
+                report((stage, done, len(futures)))
+                last_report = time.monotonic()
+    finally:
+        for future in futures:
+            future.cancel()
+    return results
+
+
+def analyze_library(dirs=None, token=None, report=None, workers=None, cache_path=ANALYSIS_CACHE):
+    """Measure the wallpapers in ``dirs`` (default: the Steam library) and find duplicates.
+
+    Returns ``{"items": [...], "duplicates": [...], "total": bytes}``. Items
+    are sorted largest first and carry id, path, title, size (on disk),
+    apparent_size and, if they were hashed, digest. Each duplicate group has
+    the ``paths`` of identical copies, largest savings first, and the bytes
+    ``wasted`` on all but one of them. ``report`` is called with
+    ``("measuring", done, total)`` and ``("hashing", done, total)``; raises
+    TaskCancelled if ``token`` is cancelled.
+    """
+    if dirs is None:
+        dirs, _ = discover_library_dirs()
+    folders = library_folders(dirs)
+    cache = DigestCache(cache_path)
+    with ThreadPoolExecutor(max_workers=workers or default_workers(), thread_name_prefix="analysis") as executor:
+        items = [i for i in run_parallel(executor, measure_item, folders, token, report, "measuring") if i]
+
+        # Only folders that share their size and file count can be identical
+        by_size = collections.defaultdict(list)
+        for item in items:
+            by_size[(item["apparent_size"], len(item["files"]))].append(item)
+        candidates = [item for group in by_size.values() if len(group) > 1 for item in group]
+        try:
+            digests = run_parallel(executor, hash_item, [(i, cache, token) for i in candidates],
+                                   token, report, "hashing")
+        finally:
+            # Keep what was hashed so far even if the run is cancelled
+            cache.save({os.path.join(i["path"], f[0]) for i in items for f in i["files"]})
+    for item, digest in zip(candidates, digests):
+        item["digest"] = digest
+
+    groups = collections.defaultdict(list)
+    for item in items:
+        if item["digest"] is not None:
+            groups[item["digest"]].append(item)
+    duplicates = []
+    for digest, group in groups.items():
+        if len(group) > 1:
+            group.sort(key=lambda i: i["path"])
+            duplicates.append({
+                "digest": digest,
+                "paths": [i["path"] for i in group],
+                "size": group[0]["size"],
+                "wasted": sum(i["size"] for i in group[1:]),
+            })
+    duplicates.sort(key=lambda d: d["wasted"], reverse=True)
+
+    for item in items:
+        del item["files"]
+    items.sort(key=lambda i: i["size"], reverse=True)
+    return {"items": items, "duplicates": duplicates, "total": sum(i["size"] for i in items)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find large and duplicate wallpapers")
+    parser.add_argument("dirs", nargs="*", help="Folders to analyze besides the Steam library")
+    parser.add_argument("--top", type=int, default=20, help="How many of the largest wallpapers to list")
+    parser.add_argument("--workers", type=int, default=None, help="Threads to measure and hash with")
+    parser.add_argument("--json", action="store_true", help="Print the full result as JSON")
+    args = parser.parse_args(argv)
+
+    dirs, _ = discover_library_dirs()
+    result = analyze_library(dirs + args.dirs, workers=args.workers)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+    titles = {i["path"]: i["title"] for i in result["items"]}
+    print(f"{len(result['items'])} wallpapers, {format_size(result['total'])} on disk")
+    print(f"\nLargest {min(args.top, len(result['items']))}:")
+    for item in result["items"][:args.top]:
+        print(f"{format_size(item['size']):>10}  {item['title']}  ({item['path']})")
+    wasted = sum(d["wasted"] for d in result["duplicates"])
+    print(f"\n{len(result['duplicates'])} duplicate groups, {format_size(wasted)} reclaimable:")
+    for group in result["duplicates"]:
+        print(f"{format_size(group['size']):>10}  {titles[group['paths'][0]]}")
+        for path in group["paths"]:
+            print(f"            {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
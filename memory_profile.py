@@ -0,0 +1,75 @@
+"""On-demand tracemalloc snapshots for hunting memory growth.
+
+Enabled with the GUI's ``--memory-profile`` flag. Every ``kill -USR1`` then
+writes a report to ``$XDG_STATE_HOME/linux-wallpaperengine-gui/memory``
+with the RSS, counts of the objects the caller cares about and the
+allocation sites that grew most since the previous report (or since
+profiling started, for the first one).
+"""
+
+import time
+import logging
+import tracemalloc
+
+from process_manager import STATE_DIR, read_rss
+
+MEMORY_DIR = STATE_DIR / "memory"
+
+
+class MemoryProfiler:
+    def __init__(self, out_dir=MEMORY_DIR, frames=10, top=30):
+        self.out_dir = out_dir
+        self.frames = frames
+        self.top = top
+        self.previous = None
+        self.previous_counts = {}
+        self.count = 0
+
+    def start(self):
+        tracemalloc.start(self.frames)
+        self.previous = self.take_snapshot()
+        logging.info("Memory profiling on; send SIGUSR1 to write a snapshot to %s", self.out_dir)
+
+    def take_snapshot(self):
+        # Every snapshot, the baseline included, drops the same frames so
+        # they don't show up as growth or shrinkage
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ))
+
+    def snapshot(self, counts=None):
+        """Write a report diffing against the previous snapshot; returns its path, or None if it can't be written."""
+        counts = counts or {}
+        current = self.take_snapshot()
+        stats = current.compare_to(self.previous, "lineno")
+        traced, peak = tracemalloc.get_traced_memory()
+        rss = read_rss()
+        self.count += 1
+
+        lines = [
+            f"Snapshot {self.count} at {time.strftime('%Y-%m-%d %H:%M:%S')}",
+            f"RSS: {rss / 2**20:.1f} MB" if rss is not None else "RSS: unknown",
+            f"Traced by tracemalloc: {traced / 2**20:.1f} MB (peak {peak / 2**20:.1f} MB)",
+            "",
+            "Object counts (change since last snapshot):",
+        ]
+        for name, value in counts.items():
+            delta = value - self.previous_counts.get(name, value)
+            lines.append(f"  {name}: {value} ({delta:+d})")
+        lines += ["", f"Top {self.top} allocation sites by growth:"]
+        lines += [f"  {stat}" for stat in stats[:self.top]]
+
+        path = self.out_dir / f"snapshot-{time.strftime('%Y%m%d-%H%M%S')}-{self.count}.txt"
+        try:
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+        except OSError as e:
+            # Runs from a Qt slot; keep the previous baseline for the next try
+            logging.error("Failed to write memory snapshot %s: %s", path, e)
+            return None
+        self.previous = current
+        self.previous_counts = dict(counts)
+        logging.info("Wrote memory snapshot to %s", path)
+        return path
@@ -27,8 +27,19 @@ pkgs.stdenv.mkDerivation rec {
     cp -r ./locales $out/bin
     install -Dm755 ./wallpaper_gui.py $out/bin/simple-wallpaper-engine
     install -Dm644 ./process_manager.py $out/bin/process_manager.py
+    install -Dm644 ./library_analysis.py $out/bin/library_analysis.py
+    install -Dm644 ./scene_pkg.py $out/bin/scene_pkg.py
+    install -Dm644 ./scan_worker.py $out/bin/scan_worker.py
+    install -Dm644 ./memory_profile.py $out/bin/memory_profile.py
+    install -Dm644 ./tracing.py $out/bin/tracing.py
+    install -Dm644 ./library.py $out/bin/library.py
+    install -Dm644 ./config_store.py $out/bin/config_store.py
+    install -Dm644 ./ipc.py $out/bin/ipc.py
+    install -Dm755 ./wallpaper_daemon.py $out/bin/simple-wallpaper-engine-ctl
     wrapProgram $out/bin/simple-wallpaper-engine \
       --prefix PATH : ${lib.makeBinPath propagatedBuildInputs}
+    wrapProgram $out/bin/simple-wallpaper-engine-ctl \
+      --prefix PATH : ${lib.makeBinPath propagatedBuildInputs}
     mkdir -p $out/share/applications
     install -Dm644 ./simple-wallpaper-engine.desktop $out/share/applications/simple-wallpaper-engine.desktop
     install -Dm644 ./simple-wallpaper-engine-autostart.desktop $out/share/applications/simple-wallpaper-engine-autostart.desktop
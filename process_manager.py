@@ -1,62 +1,377 @@
+import collections
+import ctypes
+import ctypes.util
+import contextlib
+import fcntl
+import gzip
+import itertools
+import json
 import os
 import pathlib
+import platform
+import re
+import resource
+import shutil
 import shlex
+import signal
 import subprocess
+import threading
 import time
 import logging
+from concurrent import futures
 
-LOG_DIR = pathlib.Path(
+import tracing
+
+STATE_DIR = pathlib.Path(
     os.getenv("XDG_STATE_HOME", os.path.expanduser("~/.local/state"))
-) / "linux-wallpaperengine-gui" / "logs"
+) / "linux-wallpaperengine-gui"
+LOG_DIR = STATE_DIR / "logs"
 LOG_FILE = LOG_DIR / "wallpaperengine.log"
+# Written at the start of every launch so the latest run can be found quickly
+LAUNCH_MARKER = "=== wallpaperengine launch ==="
+DEFAULT_LOG_SETTINGS = {
+    "max_bytes": 10 * 1024 * 1024,
+    "backup_count": 3,
+    "compress": True,
+}
+# Lines of backend output kept in memory for the in-app log viewer
+DEFAULT_LOG_BUFFER_LINES = 5000
+# PIDs (with /proc start times) of the backends we launched
+OWNED_PIDS_FILE = STATE_DIR / "backends.json"
+OWNED_PIDS_LOCK = STATE_DIR / "backends.json.lock"
+
+_owned_lock = threading.Lock()
+_rotate_lock = threading.Lock()
+
+# I/O scheduling classes understood by ioprio_set(2)
+IO_CLASSES = {"default": 0, "realtime": 1, "best-effort": 2, "idle": 3}
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_SHIFT = 13
+# ioprio_set has no libc wrapper; syscall numbers per architecture
+SYS_IOPRIO_SET = {
+    "x86_64": 251, "i386": 289, "i686": 289, "aarch64": 30, "riscv64": 30,
+    "armv7l": 314, "ppc64le": 273, "ppc64": 273, "s390x": 282,
+}
+
+DEFAULT_LAUNCH_OPTIONS = {
+    "nice": 0,
+    "io_class": "default",
+    "cpu_affinity": "",
+    "memory_limit_mb": 0,
+}
 
 class WallpaperProcessManager:
-    def __init__(self):
+    """Owns the backend process.
+
+    Stopping happens on a background thread so callers never block on
+    ``wait()``. Backend output is read from a pipe by a LogPump thread that
+    writes the log file and keeps the latest lines in ``log_buffer``. A
+    launch requested while a stop is still pending is queued and started
+    as soon as the old process is gone. The PID file update and the log
+    reader's shutdown after a process exits run, in order, on a separate
+    bookkeeping thread, as they may wait on a file lock or a thread join.
+    Completion is reported
+    through the optional ``on_stopped(stopped)``, ``on_started(proc)`` and
+    ``on_start_failed(error)`` callbacks, which run on the stop thread.
+    """
+
+    def __init__(self, on_stopped=None, on_started=None, on_start_failed=None, log_settings=None,
+                 log_buffer_lines=DEFAULT_LOG_BUFFER_LINES):
         self._proc = None
         self._log_path = None
-        self._log_handle = None
+        self._log_pump = None
         self._expected_stop = False
+        self._lock = threading.RLock()
+        self._stop_thread = None
+        self._pending_cmd = None
+        self._pending_options = None
+        self._last_stopped = False
+        self._paused = False
+        self._bookkeeping = futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="wallpaper-bookkeeping")
+        self._last_bookkeeping = None
+        self.log_settings = dict(DEFAULT_LOG_SETTINGS, **(log_settings or {}))
+        self.log_buffer = LogBuffer(log_buffer_lines)
+        self.on_stopped = on_stopped
+        self.on_started = on_started
+        self.on_start_failed = on_start_failed
+
+    def start(self, cmd, options=None):
+        with self._lock:
+            if self.is_stopping():
+                self._pending_cmd = list(cmd)
+                self._pending_options = options
+                return None
+            return self._launch(cmd, options)
 
-    def start(self, cmd):
+    def _launch(self, cmd, options=None):
         self._expected_stop = False
-        self._proc, self._log_path, self._log_handle = start_wallpaper_process(cmd)
+        self._paused = False
+        with tracing.span("start_backend", cmd=list(cmd)) as span:
+            self._proc, self._log_path, self._log_pump = start_wallpaper_process(
+                cmd, options, log_settings=self.log_settings, log_buffer=self.log_buffer
+            )
+            self._bookkeep(record_owned_process, self._proc.pid, list(cmd))
+            span.set(pid=self._proc.pid)
         return self._proc
 
     def stop(self, timeout=1):
-        self._expected_stop = True
-        stopped = stop_process(self._proc, self._log_handle, timeout=timeout)
-        self._proc = None
-        self._log_handle = None
-        self._log_path = None
-        return stopped
+        """Stop the backend and block until it has exited."""
+        self.stop_async(timeout=timeout)
+        self.wait_idle()
+        return self._last_stopped
+
+    def stop_async(self, timeout=1):
+        """Begin stopping the backend and return immediately.
+
+        Returns False when there was nothing to stop, True otherwise.
+        """
+        with self._lock:
+            self._pending_cmd = None
+            if self._paused and self._proc is not None:
+                # A stopped process can't act on SIGTERM until continued
+                self.resume()
+            proc, log_pump = self._proc, self._log_pump
+            self._expected_stop = True
+            self._proc = None
+            self._log_pump = None
+            self._log_path = None
+            if proc is None:
+                self._last_stopped = False
+                return False
+            self._stop_thread = threading.Thread(
+                target=self._stop_worker,
+                args=(proc, log_pump, timeout),
+                name="wallpaper-stop",
+                daemon=True,
+            )
+            self._stop_thread.start()
+            return True
+
+    def restart(self, cmd, options=None, timeout=1):
+        """Stop the current backend (if any) and launch ``cmd`` after it."""
+        with self._lock:
+            self.stop_async(timeout=timeout)
+            return self.start(cmd, options)
+
+    def _stop_worker(self, proc, log_pump, timeout):
+        with tracing.span("stop_backend", pid=proc.pid) as span:
+            stopped = stop_process(proc, log_pump, timeout=timeout)
+            if stopped:
+                self._bookkeep(forget_owned_process, proc.pid)
+            span.set(stopped=stopped)
+        started = None
+        error = None
+        with self._lock:
+            self._last_stopped = stopped
+            cmd, options = self._pending_cmd, self._pending_options
+            self._pending_cmd = None
+            self._pending_options = None
+            if cmd is not None:
+                try:
+                    started = self._launch(cmd, options)
+                except Exception as e:
+                    logging.error("Couldn't run queued wallpaper with error %s", e)
+                    error = e
+            self._stop_thread = None
+        if self.on_stopped:
+            self.on_stopped(stopped)
+        if started is not None and self.on_started:
+            self.on_started(started)
+        if error is not None and self.on_start_failed:
+            self.on_start_failed(error)
+
+    def is_stopping(self):
+        thread = self._stop_thread
+        return thread is not None and thread.is_alive()
+
+    def wait_idle(self, timeout=None):
+        """Wait for a pending stop (and queued launch) and the bookkeeping to finish."""
+        thread = self._stop_thread
+        if thread is not None:
+            thread.join(timeout)
+        future = self._last_bookkeeping
+        if future is not None:
+            # A single worker runs tasks in order, so the last one finishing means all have
+            futures.wait([future], timeout)
+        return not self.is_stopping() and (future is None or future.done())
+
+    def _bookkeep(self, func, *args):
+        self._last_bookkeeping = self._bookkeeping.submit(self._run_bookkeeping, func, *args)
+
+    @staticmethod
+    def _run_bookkeeping(func, *args):
+        try:
+            func(*args)
+        except Exception as e:
+            logging.error("%s failed: %s", func.__name__, e)
 
     def is_running(self):
-        return self._proc is not None
+        return self._proc is not None or self._pending_cmd is not None
+
+    def pid(self):
+        proc = self._proc
+        return proc.pid if proc is not None else None
+
+    def is_paused(self):
+        return self._paused and self._proc is not None
+
+    def pause(self):
+        """Freeze the backend with SIGSTOP; returns False if nothing is running."""
+        return self._signal_backend(signal.SIGSTOP, paused=True)
+
+    def resume(self):
+        return self._signal_backend(signal.SIGCONT, paused=False)
+
+    def _signal_backend(self, signum, paused):
+        with self._lock:
+            if self._proc is None:
+                return False
+            try:
+                self._proc.send_signal(signum)
+            except ProcessLookupError:
+                return False
+            self._paused = paused
+            return True
 
     def log_path(self):
         return self._log_path or LOG_FILE
 
     def check(self):
-        if self._proc is None:
-            return None
-        returncode = self._proc.poll()
-        if returncode is None:
-            return None
-        close_log_handle(self._log_handle)
-        log_path = self._log_path
-        expected = self._expected_stop
-        self._proc = None
-        self._log_handle = None
-        self._log_path = None
-        self._expected_stop = False
+        with self._lock:
+            if self._proc is None:
+                return None
+            returncode = self._proc.poll()
+            if returncode is None:
+                return None
+            # The pipe is at EOF or close to it; let the reader finish off this thread
+            self._bookkeep(close_log_pump, self._log_pump)
+            self._bookkeep(forget_owned_process, self._proc.pid)
+            log_path = self._log_path
+            expected = self._expected_stop
+            self._proc = None
+            self._log_pump = None
+            self._log_path = None
+            self._expected_stop = False
         return {
             "returncode": returncode,
             "log_path": log_path,
             "expected": expected,
         }
 
-    def kill_external(self, process_name):
-        return kill_external_wallpapers(process_name, ignore_pid=os.getpid())
+    def log_tail(self):
+        """Return the buffered output, seeding it from the log file's tail if empty."""
+        if not len(self.log_buffer):
+            self.log_buffer.extend(read_log_tail(self.log_path(), self.log_buffer.maxlen))
+        return self.log_buffer
+
+    def kill_orphans(self):
+        """SIGTERM backends recorded by a GUI session that is no longer alive."""
+        with self._lock:
+            ignore = {self._proc.pid} if self._proc is not None else set()
+        return kill_orphaned_wallpapers(ignore_pids=ignore)
+
+
+class LogBuffer:
+    """Thread-safe ring buffer of log lines with a running sequence number.
+
+    Readers remember the last sequence they saw and ask for what came after
+    it, so polling costs only the new lines, bounded by ``maxlen``.
+    """
+
+    def __init__(self, maxlen=DEFAULT_LOG_BUFFER_LINES):
+        self.maxlen = maxlen
+        self._lines = collections.deque(maxlen=maxlen)
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._lines)
+
+    def append(self, line):
+        with self._lock:
+            self._lines.append(line)
+            self._seq += 1
+
+    def extend(self, lines):
+        with self._lock:
+            for line in lines:
+                self._lines.append(line)
+                self._seq += 1
+
+    def lines_since(self, seq):
+        """Return ``(current_seq, lines appended after seq)``."""
+        with self._lock:
+            count = min(self._seq - seq, len(self._lines))
+            if count <= 0:
+                return self._seq, []
+            start = len(self._lines) - count
+            return self._seq, list(itertools.islice(self._lines, start, None))
+
+
+class LogPump:
+    """Copies backend output from its pipe into the log file and a LogBuffer.
+
+    Runs on its own thread, which opens the log file, writes ``header``
+    and rotates the file whenever it grows past ``max_bytes``. If the log
+    can't be written the output is still drained so the backend never blocks.
+    """
+
+    def __init__(self, stream, header, log_settings=None, log_buffer=None):
+        self._stream = stream
+        self._header = header
+        self._log_handle = None
+        self._settings = dict(DEFAULT_LOG_SETTINGS, **(log_settings or {}))
+        self._buffer = log_buffer
+        self._thread = threading.Thread(target=self._run, name="wallpaper-log", daemon=True)
+        self._thread.start()
+
+    def _write(self, text):
+        if self._log_handle is None:
+            return
+        try:
+            self._log_handle.write(text)
+        except Exception as e:
+            logging.error("Failed to write wallpaper log: %s", e)
+            close_log_handle(self._log_handle)
+            self._log_handle = None
+
+    def _run(self):
+        written = 0
+        try:
+            log_path, self._log_handle = open_wallpaper_log(self._settings)
+            written = os.fstat(self._log_handle.fileno()).st_size
+        except Exception as e:
+            logging.error("Failed to open wallpaper log: %s", e)
+        self._write(f"\n{self._header}\n")
+        try:
+            for raw in iter(self._stream.readline, b""):
+                line = raw.decode("utf-8", "replace")
+                self._write(line)
+                if self._buffer is not None:
+                    self._buffer.append(line.rstrip("\n"))
+                written += len(raw)
+                if self._log_handle is not None and written > self._settings["max_bytes"]:
+                    close_log_handle(self._log_handle)
+                    self._log_handle = None
+                    rotate_log(log_path, self._settings)
+                    written = 0
+                    try:
+                        log_path, self._log_handle = open_wallpaper_log(self._settings)
+                    except Exception as e:
+                        # Keep draining the pipe; a closed pipe would kill the backend
+                        logging.error("Failed to reopen wallpaper log: %s", e)
+        except Exception as e:
+            logging.error("Wallpaper log reader stopped: %s", e)
+        finally:
+            close_log_handle(self._log_handle)
+            try:
+                self._stream.close()
+            except Exception:
+                pass
+
+    def close(self, timeout=1):
+        # The pipe reaches EOF once the backend exits; let the reader drain it
+        self._thread.join(timeout)
 
 
 def ensure_log_dir():
@@ -67,15 +382,152 @@ def ensure_log_dir():
     return LOG_DIR
 
 
-def open_wallpaper_log(cmd):
-    ensure_log_dir()
-    log_handle = open(LOG_FILE, "a", encoding="utf-8")
+def rotated_log_path(path, index, compress):
+    return path.with_name(f"{path.name}.{index}" + (".gz" if compress else ""))
+
+
+def rotate_log(path, log_settings=None):
+    """Move ``path`` to ``path.1``, shifting older segments up.
+
+    Only the LogPump writes the file, so a rename is enough; the caller
+    reopens ``path`` afterwards. With compression on, the new segment is
+    gzipped on a background thread so the pipe reader never waits on it.
+    """
+    settings = dict(DEFAULT_LOG_SETTINGS, **(log_settings or {}))
+    path = pathlib.Path(path)
+    backup_count = max(0, int(settings["backup_count"]))
+    try:
+        with _rotate_lock:
+            if backup_count == 0:
+                path.unlink()
+                return
+            for index in range(backup_count, 0, -1):
+                for compressed in (True, False):
+                    src = rotated_log_path(path, index, compressed)
+                    if not src.exists():
+                        continue
+                    if index == backup_count:
+                        src.unlink()
+                    else:
+                        os.replace(src, rotated_log_path(path, index + 1, compressed))
+            segment = rotated_log_path(path, 1, False)
+            os.replace(path, segment)
+            # Opened before the lock is released, so a later shift can't swap it
+            source = open(segment, "rb") if settings["compress"] else None
+    except FileNotFoundError:
+        return
+    except Exception as e:
+        logging.error("Failed to rotate %s: %s", path, e)
+        return
+    if source is not None:
+        threading.Thread(target=compress_log_segment, args=(path, source, backup_count),
+                         name="wallpaper-log-gzip", daemon=True).start()
+
+
+def compress_log_segment(path, source, backup_count):
+    """Gzip the rotated segment open as ``source`` next to it, wherever it has moved.
+
+    The copy runs without the rotation lock; the lock is only taken to
+    swap the plain segment for the compressed one. Further rotations may
+    shift the segment meanwhile, so it is found again by its inode.
+    """
+    inode = os.fstat(source.fileno()).st_ino
+    tmp_target = path.with_name(f"{path.name}.{inode}.gz.tmp")
+    try:
+        with source, gzip.open(tmp_target, "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(source, dst, 1024 * 1024)
+        with _rotate_lock:
+            for index in range(1, backup_count + 1):
+                segment = rotated_log_path(path, index, False)
+                try:
+                    if segment.stat().st_ino != inode:
+                        continue
+                except FileNotFoundError:
+                    continue
+                # A compression cut short at exit leaves the plain segment intact
+                os.replace(tmp_target, rotated_log_path(path, index, True))
+                segment.unlink()
+                return
+    except Exception as e:
+        logging.error("Failed to compress %s: %s", source.name, e)
+    # The segment was rotated out while it was compressed
+    try:
+        tmp_target.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def find_last_launch(path, chunk_size=64 * 1024):
+    """Return the byte offset of the latest launch marker in ``path``, or None.
+
+    Reads backwards from the end in chunks, so the cost depends on the size
+    of the last run's output, not on the size of the file.
+    """
+    marker = LAUNCH_MARKER.encode()
+    try:
+        with open(path, "rb") as f:
+            end = f.seek(0, os.SEEK_END)
+            pos = end
+            tail = b""
+            while pos > 0:
+                read_size = min(chunk_size, pos)
+                pos -= read_size
+                f.seek(pos)
+                block = f.read(read_size) + tail
+                found = block.rfind(marker)
+                if found != -1:
+                    return pos + found
+                # Keep enough bytes to catch a marker split across chunks
+                tail = block[:len(marker) - 1]
+    except OSError:
+        pass
+    return None
+
+
+def read_log_tail(path, max_lines, chunk_size=64 * 1024):
+    """Return up to ``max_lines`` last lines of ``path`` without reading all of it."""
+    lines = []
+    try:
+        with open(path, "rb") as f:
+            pos = f.seek(0, os.SEEK_END)
+            data = b""
+            while pos > 0 and data.count(b"\n") <= max_lines:
+                read_size = min(chunk_size, pos)
+                pos -= read_size
+                f.seek(pos)
+                data = f.read(read_size) + data
+            lines = data.decode("utf-8", "replace").splitlines()
+            if pos > 0:
+                # First line is probably cut in the middle
+                lines = lines[1:]
+    except OSError:
+        pass
+    return lines[-max_lines:]
+
+
+def launch_header(cmd):
     timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
-    log_handle.write(f"\n[{timestamp}] command: {shlex.join(cmd)}\n")
-    log_handle.flush()
+    return f"{LAUNCH_MARKER} [{timestamp}] command: {shlex.join(cmd)}"
+
+
+def open_wallpaper_log(log_settings=None):
+    ensure_log_dir()
+    settings = dict(DEFAULT_LOG_SETTINGS, **(log_settings or {}))
+    try:
+        if LOG_FILE.stat().st_size > settings["max_bytes"]:
+            rotate_log(LOG_FILE, settings)
+    except FileNotFoundError:
+        pass
+    # Line buffered: the file stays current for external viewers
+    log_handle = open(LOG_FILE, "a", encoding="utf-8", buffering=1)
     return LOG_FILE, log_handle
 
 
+def close_log_pump(log_pump, timeout=1):
+    if log_pump is not None:
+        log_pump.close(timeout)
+
+
 def close_log_handle(log_handle):
     if log_handle is None:
         return
@@ -86,24 +538,255 @@ def close_log_handle(log_handle):
         pass
 
 
-def start_wallpaper_process(cmd):
-    log_path, log_handle = open_wallpaper_log(cmd)
-    try:
-        proc = subprocess.Popen(
-            cmd,
-            stdout=log_handle,
-            stderr=subprocess.STDOUT,
-            text=True,
-        )
-        return proc, log_path, log_handle
-    except Exception:
-        close_log_handle(log_handle)
-        raise
+def normalize_property_value(value):
+    if "," in value:
+        value = re.sub(r"\s*,\s*", ",", value)
+    return value
+
+
+def build_wallpaper_command(settings, properties=None, geometry=None):
+    """Build the linux-wallpaperengine command line.
+
+    ``settings`` uses the keys stored under ``last_wallpaper`` in the config
+    plus ``scale`` and ``clamp``; ``properties`` maps property names to
+    ``{"value", "sep"}``. ``geometry`` ("XxYxWxH") is used in windowed mode.
+    """
+    cmd = ['linux-wallpaperengine']
+    if settings.get("windowed_mode"):
+        cmd.extend(['--window', geometry or "0x0x1920x1080"])
+    else:
+        cmd.extend(['--screen-root', settings.get("screen", "")])
+
+    cmd.extend(['--bg', str(settings.get("background_id", ""))])
+    volume = int(settings.get("volume", 15))
+    fps = int(settings.get("fps", 30))
+    if settings.get("silent"): cmd.append('--silent')
+    elif volume != 15: cmd.extend(['--volume', str(volume)])
+    if settings.get("noautomute"): cmd.append('--noautomute')
+    if settings.get("no-audio-processing"): cmd.append('--no-audio-processing')
+    if fps != 30: cmd.extend(['--fps', str(fps)])
+    if settings.get("disable-mouse"): cmd.append('--disable-mouse')
+    if settings.get("disable-parallax"): cmd.append('--disable-parallax')
+    if settings.get("no-fullscreen-pause"): cmd.append('--no-fullscreen-pause')
+    scale = settings.get("scale", "default")
+    if scale != 'default': cmd.extend(['--scaling', scale])
+    clamp = settings.get("clamp", "clamp")
+    if clamp != 'clamp': cmd.extend(['--clamp', clamp])
+    for name, data in (properties or {}).items():
+        value = normalize_property_value(str(data.get("value", "")))
+        sep = data.get("sep", "=")
+        cmd.extend(['--set-property', f"{name}{sep}{value}"])
+    custom_args = settings.get("custom_args", "")
+    if custom_args:
+        cmd.extend(custom_args.split())
+    return cmd
+
+
+def parse_properties_output(output):
+    """Parse the property listing of ``linux-wallpaperengine -l``.
+
+    Returns a list of ``(name, value, sep, type)`` tuples; the backend has
+    printed JSON as well as several plain text layouts over time.
+    """
+    props = []
+
+    text = output.strip()
+    if text:
+        try:
+            parsed = json.loads(text)
+        except Exception:
+            parsed = None
+
+        if parsed is None:
+            start = text.find("{")
+            end = text.rfind("}")
+            if start != -1 and end != -1 and end > start:
+                try:
+                    parsed = json.loads(text[start:end + 1])
+                except Exception:
+                    parsed = None
+
+        if isinstance(parsed, dict):
+            for name, value in parsed.items():
+                props.append((str(name), str(value), "=", ""))
+            return props
+        if isinstance(parsed, list):
+            for item in parsed:
+                if isinstance(item, dict):
+                    name = item.get("name") or item.get("property") or item.get("key")
+                    if name is None:
+                        continue
+                    value = item.get("value", "")
+                    props.append((str(name), str(value), "=", ""))
+                elif isinstance(item, str):
+                    props.append((item, "", "=", ""))
+            if props:
+                return props
+
+    lines = output.splitlines()
+    current_name = None
+    current_type = ""
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if stripped.startswith("_") or " - " in stripped:
+            parts = stripped.split(" - ", 1)
+            if parts:
+                current_name = parts[0].strip()
+                current_type = parts[1].strip() if len(parts) > 1 else ""
+            continue
+        if stripped.startswith("Value:"):
+            if current_name:
+                value = stripped.split("Value:", 1)[1].strip()
+                props.append((current_name, value, "=", current_type))
+                current_name = None
+                current_type = ""
+            continue
 
+    if props:
+        return props
 
-def stop_process(proc, log_handle=None, timeout=1):
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        lower = line.lower()
+        if lower.startswith("properties") or line.startswith("#"):
+            continue
+        if lower.startswith("running with") or lower.startswith("particle "):
+            continue
+        if lower.startswith("found user setting with script value"):
+            continue
+        if "=" in line:
+            name, value = line.split("=", 1)
+            sep = "="
+        elif ":" in line:
+            name, value = line.split(":", 1)
+            sep = ":"
+        else:
+            parts = line.split(None, 1)
+            name = parts[0]
+            value = parts[1] if len(parts) > 1 else ""
+            sep = "="
+        name = name.strip()
+        value = value.strip()
+        if name:
+            props.append((name, value, sep, ""))
+    return props
+
+
+def parse_cpu_list(text):
+    """Parse a cpuset-style list such as ``"0-3,6"`` into a set of CPU ids."""
+    cpus = set()
+    for part in str(text).replace(" ", "").split(","):
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-", 1)
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(part))
+    return cpus
+
+
+def normalize_launch_options(options):
+    normalized = dict(DEFAULT_LAUNCH_OPTIONS)
+    if options:
+        normalized.update({k: v for k, v in options.items() if k in DEFAULT_LAUNCH_OPTIONS})
+    return normalized
+
+
+def _load_ioprio_set():
+    number = SYS_IOPRIO_SET.get(platform.machine())
+    libc_name = ctypes.util.find_library("c")
+    if number is None or libc_name is None:
+        return None
+    libc = ctypes.CDLL(libc_name, use_errno=True)
+
+    def ioprio_set(pid, value):
+        if libc.syscall(number, IOPRIO_WHO_PROCESS, pid, value) != 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+    return ioprio_set
+
+
+def apply_launch_options(pid, options):
+    """Apply launch options to the already started process ``pid`` from the parent.
+
+    Nothing runs between fork and exec (a preexec_fn isn't safe with the
+    GUI's threads), so the limits are set by pid right after the start. A
+    limit that can't be applied is logged and the others still are.
+    """
+    options = normalize_launch_options(options)
+    nice = max(0, min(19, int(options["nice"] or 0)))
+    if nice:
+        try:
+            # Relative to our own niceness, as nice(1) would be
+            niceness = min(19, os.getpriority(os.PRIO_PROCESS, 0) + nice)
+            os.setpriority(os.PRIO_PROCESS, pid, niceness)
+        except OSError as e:
+            logging.error("Failed to set niceness of %s: %s", pid, e)
+
+    if options["cpu_affinity"]:
+        cpus = None
+        try:
+            cpus = parse_cpu_list(options["cpu_affinity"]) & os.sched_getaffinity(0)
+        except ValueError:
+            logging.error("Invalid CPU affinity %r, ignoring", options["cpu_affinity"])
+        if cpus:
+            try:
+                os.sched_setaffinity(pid, cpus)
+            except OSError as e:
+                logging.error("Failed to set CPU affinity of %s: %s", pid, e)
+
+    io_class = IO_CLASSES.get(options["io_class"], 0)
+    if io_class:
+        ioprio_set = _load_ioprio_set()
+        if ioprio_set is None:
+            logging.error("ioprio_set is not available on %s", platform.machine())
+        else:
+            # best-effort/realtime take a level 0-7; 4 is the kernel default
+            try:
+                ioprio_set(pid, (io_class << IOPRIO_CLASS_SHIFT) | (4 if io_class in (1, 2) else 0))
+            except OSError as e:
+                logging.error("Failed to set I/O priority of %s: %s", pid, e)
+
+    limit_bytes = int(options["memory_limit_mb"] or 0) * 1024 * 1024
+    if limit_bytes > 0:
+        # Soft limits only; RLIMIT_RSS is a no-op on modern Linux but kept where honoured
+        for name in ("RLIMIT_AS", "RLIMIT_RSS"):
+            res = getattr(resource, name, None)
+            if res is None:
+                continue
+            try:
+                hard = resource.prlimit(pid, res)[1]
+                if hard != resource.RLIM_INFINITY:
+                    limit_bytes = min(limit_bytes, hard)
+                resource.prlimit(pid, res, (limit_bytes, hard))
+            except (ValueError, OSError) as e:
+                logging.error("Failed to set %s of %s: %s", name, pid, e)
+
+
+def start_wallpaper_process(cmd, options=None, log_settings=None, log_buffer=None):
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    apply_launch_options(proc.pid, options)
+    header = launch_header(cmd)
+    if log_buffer is not None:
+        log_buffer.append("")
+        log_buffer.append(header)
+    log_pump = LogPump(proc.stdout, header, log_settings, log_buffer)
+    return proc, LOG_FILE, log_pump
+
+
+def stop_process(proc, log_pump=None, timeout=1):
     if proc is None:
-        close_log_handle(log_handle)
+        close_log_pump(log_pump)
         return False
     stopped = False
     try:
@@ -117,27 +800,142 @@ def stop_process(proc, log_handle=None, timeout=1):
             stopped = True
         except Exception:
             stopped = False
-    close_log_handle(log_handle)
+    close_log_pump(log_pump)
     return stopped
 
 
-def kill_external_wallpapers(process_name, ignore_pid=None):
+def read_proc_start_time(pid):
+    """Return the start time of ``pid`` in clock ticks since boot, or None."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    # comm (field 2) may contain spaces and parentheses; fields resume after the last ')'
+    try:
+        fields = data[data.rindex(b")") + 2:].split()
+        return int(fields[19])
+    except (ValueError, IndexError):
+        return None
+
+
+def read_rss(pid="self"):
+    """Return the resident set size of ``pid`` in bytes, or None."""
+    try:
+        with open(f"/proc/{pid}/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def trim_heap():
+    """Hand freed heap pages back to the kernel (glibc only); returns True if any were."""
+    libc_name = ctypes.util.find_library("c")
+    if libc_name is None:
+        return False
+    try:
+        return bool(ctypes.CDLL(libc_name).malloc_trim(0))
+    except (OSError, AttributeError):
+        return False
+
+
+def load_owned_processes():
+    try:
+        with open(OWNED_PIDS_FILE, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except FileNotFoundError:
+        return []
+    except Exception as e:
+        logging.error("Failed to read %s: %s", OWNED_PIDS_FILE, e)
+        return []
+    return [e for e in entries if isinstance(e, dict) and "pid" in e]
+
+
+def save_owned_processes(entries):
     try:
-        cmd = ["pgrep", "-f", process_name]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode != 0:
-            return 0
-        killed = 0
-        for pid_str in result.stdout.splitlines():
+        STATE_DIR.mkdir(parents=True, exist_ok=True)
+        # The GUI and the daemon both write the file
+        tmp_path = OWNED_PIDS_FILE.with_name(f"{OWNED_PIDS_FILE.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, OWNED_PIDS_FILE)
+    except Exception as e:
+        logging.error("Failed to write %s: %s", OWNED_PIDS_FILE, e)
+
+
+@contextlib.contextmanager
+def owned_processes_lock():
+    """Serialise read-modify-writes of OWNED_PIDS_FILE across threads and processes."""
+    with _owned_lock:
+        try:
+            STATE_DIR.mkdir(parents=True, exist_ok=True)
+            lock_file = open(OWNED_PIDS_LOCK, "a")
+        except OSError as e:
+            logging.error("Failed to open %s: %s", OWNED_PIDS_LOCK, e)
+            yield
+            return
+        with lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+
+def record_owned_process(pid, cmd):
+    entry = {
+        "pid": pid,
+        "start_time": read_proc_start_time(pid),
+        "owner_pid": os.getpid(),
+        "owner_start_time": read_proc_start_time(os.getpid()),
+        "cmd": list(cmd),
+    }
+    with owned_processes_lock():
+        entries = [e for e in load_owned_processes() if e["pid"] != pid]
+        entries.append(entry)
+        save_owned_processes(entries)
+
+
+def forget_owned_process(pid):
+    with owned_processes_lock():
+        entries = load_owned_processes()
+        remaining = [e for e in entries if e["pid"] != pid]
+        if len(remaining) != len(entries):
+            save_owned_processes(remaining)
+
+
+def _is_same_process(pid, start_time):
+    # A recycled PID has a different start time, so it is never ours
+    return start_time is not None and read_proc_start_time(pid) == start_time
+
+
+def kill_orphaned_wallpapers(ignore_pids=()):
+    """Terminate recorded backends whose owning GUI session has exited.
+
+    Only processes listed in OWNED_PIDS_FILE whose /proc start time still
+    matches are signalled, so backends started by other tools are left alone.
+    """
+    killed = 0
+    with owned_processes_lock():
+        entries = load_owned_processes()
+        remaining = []
+        for entry in entries:
+            pid = entry["pid"]
+            if pid in ignore_pids:
+                remaining.append(entry)
+                continue
+            if not _is_same_process(pid, entry.get("start_time")):
+                continue
+            owner_alive = _is_same_process(entry.get("owner_pid"), entry.get("owner_start_time"))
+            if owner_alive and entry.get("owner_pid") != os.getpid():
+                # Still managed by another running session
+                remaining.append(entry)
+                continue
             try:
-                pid = int(pid_str)
-                if ignore_pid is not None and pid == ignore_pid:
-                    continue
-                os.kill(pid, 15)
+                os.kill(pid, signal.SIGTERM)
                 killed += 1
-            except (ValueError, ProcessLookupError):
-                continue
-        return killed
-    except Exception as e:
-        logging.error("Failed to kill external wallpapers: %s", e)
-        return 0
+            except ProcessLookupError:
+                pass
+            except Exception as e:
+                logging.error("Failed to kill orphaned wallpaper %s: %s", pid, e)
+                remaining.append(entry)
+        if remaining != entries:
+            save_owned_processes(remaining)
+    return killed
@@ -1,4 +1,4 @@
 #!/bin/bash
 cd "$(dirname "$0")"
 source .venv/bin/activate
-python wallpaper_gui.py
\ No newline at end of file
+python wallpaper_gui.py "$@"
\ No newline at end of file
@@ -0,0 +1,235 @@
+"""Library scanning and thumbnail caching, on a thread or in a child process.
+
+The GUI's scan task calls ``scan_and_cache_library`` directly, or, with
+``"scan_in_subprocess": true`` in the config, ``scan_in_subprocess``. The
+latter runs this file as a child process so the JSON parsing and image work
+of a big scan don't hold the GUI process's GIL. The child sends its results
+back over a pipe as pickled tuples.
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import threading
+import subprocess
+from multiprocessing.connection import Connection
+
+from PyQt6.QtCore import Qt, QRect
+from PyQt6.QtGui import QImage
+
+import tracing
+from scene_pkg import inspect_wallpaper, inspection_key
+from library import (discover_library_dirs, iter_library, load_library_index, save_library_index, prune_thumbnails,
+                     preview_path, thumbnail_path, is_thumbnail_fresh, THUMBNAIL_DIR)
+
+
+def cache_thumbnail(wallpaper):
+    """Write the grid thumbnail of ``wallpaper`` to the cache unless it is up to date.
+
+    Returns True if a new thumbnail was written. Uses QImage, which needs no
+    QGuiApplication, so it can run on the scan thread or in the scan process.
+    """
+    thumb = thumbnail_path(wallpaper)
+    if thumb is None or is_thumbnail_fresh(wallpaper):
+        return False
+    source = preview_path(wallpaper)
+    if not os.path.isfile(source):
+        return False
+    with tracing.span("decode_thumbnail", path=source):
+        image = QImage(source)
+        if image.isNull():
+            return False
+        image = image.scaled(200, 200, Qt.AspectRatioMode.KeepAspectRatioByExpanding, Qt.TransformationMode.SmoothTransformation)
+        rect = QRect(0, 0, 200, 200)
+        rect.moveCenter(image.rect().center())
+        image = image.copy(rect)
+    try:
+        THUMBNAIL_DIR.mkdir(parents=True, exist_ok=True)
+        # Unique per thread: a watcher-triggered scan may overlap a manual one
+        tmp_path = thumb.with_name(f"{thumb.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+        if not image.save(str(tmp_path), "PNG"):
+            return False
+        os.replace(tmp_path, thumb)
+    except OSError as e:
+        logging.error("Failed to cache thumbnail %s: %s", thumb, e)
+        return False
+    return True
+
+
+def inspect_batch(batch, previous):
+    """Fill in ``"problem"`` and ``"resolution"`` of the wallpapers in ``batch``.
+
+    ``previous`` maps paths to the entries of the last saved index; an entry
+    whose main file and scene.pkg haven't changed since is reused instead of
+    reading the files again. ``"checked"`` records what the result is valid for.
+    """
+    for w in batch:
+        key = inspection_key(w["path"], w)
+        old = previous.get(w["path"])
+        if (old is not None and old.get("checked") == key
+                and old.get("file") == w["file"] and old.get("type") == w["type"]):
+            problem, resolution = old.get("problem"), old.get("resolution")
+        else:
+            problem, resolution = inspect_wallpaper(w["path"], w)
+        if problem:
+            w["problem"] = problem
+        if resolution:
+            w["resolution"] = list(resolution)
+        w["checked"] = key
+
+
+def scan_and_cache_library(manual_dir=None, token=None, report=None, batch_size=64):
+    """Scan the library and refresh the thumbnail cache and library index.
+
+    Runs on the scan thread or in the scan process. Returns ``(wallpapers, is_append, scanned_dirs,
+    refreshed_ids)``, the last being the ids whose thumbnail was rewritten.
+    Raises TaskCancelled before the index is saved if ``token`` is cancelled.
+
+    Wallpapers that fail the preflight check get the reason as ``"problem"``,
+    and ``"resolution"`` is filled in where the files tell it; items that
+    haven't changed since the last saved index aren't read again.
+    ``report`` is called with ``("found", batch, found, folders_left)`` as
+    wallpapers are read and ``("thumbnails", paths, done, total)`` as
+    thumbnails are written, so the grid can fill in while the scan runs.
+    """
+    scanned_dirs, is_append = discover_library_dirs(manual_dir)
+    wallpapers = []
+    previous = {w.get("path"): w for w in load_library_index() if isinstance(w, dict)}
+    with tracing.span("scan_library") as span:
+        for batch, folders_left in iter_library(scanned_dirs, batch_size):
+            if token is not None:
+                token.check()
+            inspect_batch(batch, previous)
+            wallpapers.extend(batch)
+            if report is not None:
+                report(("found", batch, len(wallpapers), folders_left))
+        span.set(items=len(wallpapers))
+    with tracing.span("cache_thumbnails") as span:
+        refreshed = set()
+        written = []
+        last_report = time.monotonic()
+        for done, w in enumerate(wallpapers, 1):
+            if token is not None:
+                token.check()
+            if cache_thumbnail(w):
+                refreshed.add(w["id"])
+                written.append(str(thumbnail_path(w)))
+            # Thumbnails are slow to decode; repaint what's ready a few times a second
+            if report is not None and written and (done == len(wallpapers) or time.monotonic() - last_report >= 0.1):
+                report(("thumbnails", written, done, len(wallpapers)))
+                written = []
+                last_report = time.monotonic()
+        span.set(refreshed=len(refreshed))
+    if token is not None:
+        token.check()
+    if not is_append:
+        with tracing.span("save_library_index"):
+            save_library_index(wallpapers, scanned_dirs)
+            prune_thumbnails(wallpapers)
+    return wallpapers, is_append, scanned_dirs, refreshed
+
+
+OPTIONAL_FIELDS = ("problem", "resolution")
+
+
+def pack_wallpaper(w):
+    return (w["id"], w["title"], w["path"], w["preview"], w.get("type"), w.get("file"),
+            w.get("contentrating"), w.get("tags", []), *(w.get(k) for k in OPTIONAL_FIELDS))
+
+
+def unpack_wallpaper(row):
+    item_id, title, path, preview, wallpaper_type, main, rating, tags = row[:8]
+    w = {"title": title, "id": item_id, "path": path, "preview": preview,
+         "type": wallpaper_type, "file": main, "contentrating": rating, "tags": tags}
+    for key, value in zip(OPTIONAL_FIELDS, row[8:]):
+        if value:
+            w[key] = value
+    return w
+
+
+def scan_in_subprocess(manual_dir=None, token=None, report=None, batch_size=64):
+    """Like ``scan_and_cache_library``, but run in a child process.
+
+    Cancelling ``token`` closes the pipe, which makes the child stop at its
+    next report. Raises RuntimeError if the child fails or dies.
+    """
+    read_fd, write_fd = os.pipe()
+    cmd = [sys.executable, os.path.abspath(__file__), "--fd", str(write_fd), "--batch-size", str(batch_size)]
+    if manual_dir:
+        cmd += ["--manual-dir", manual_dir]
+    try:
+        proc = subprocess.Popen(cmd, pass_fds=(write_fd,), stdin=subprocess.DEVNULL)
+    finally:
+        os.close(write_fd)
+    conn = Connection(read_fd, writable=False)
+    wallpapers = []
+    try:
+        while True:
+            if token is not None:
+                token.check()
+            # Wake up now and then to notice cancellation
+            if not conn.poll(0.1):
+                continue
+            try:
+                message = conn.recv()
+            except EOFError:
+                raise RuntimeError(f"Scan process exited with code {proc.wait()}") from None
+            kind = message[0]
+            if kind == "found":
+                _, rows, found, folders_left = message
+                batch = [unpack_wallpaper(row) for row in rows]
+                wallpapers.extend(batch)
+                if report is not None:
+                    report(("found", batch, found, folders_left))
+            elif kind == "thumbnails":
+                if report is not None:
+                    report(message)
+            elif kind == "done":
+                _, is_append, scanned_dirs, refreshed = message
+                return wallpapers, is_append, scanned_dirs, set(refreshed)
+            else:
+                raise RuntimeError(message[1])
+    finally:
+        conn.close()
+        try:
+            proc.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scan the wallpaper library for the GUI (internal)")
+    parser.add_argument("--fd", type=int, required=True, help="Pipe to send results to")
+    parser.add_argument("--manual-dir")
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args(argv)
+    logging.basicConfig(format='[%(asctime)s] [%(levelname)s]:  [scan] %(message)s')
+    conn = Connection(args.fd, readable=False)
+
+    def report(value):
+        if value[0] == "found":
+            _, batch, found, folders_left = value
+            value = ("found", [pack_wallpaper(w) for w in batch], found, folders_left)
+        conn.send(value)
+
+    try:
+        _, is_append, scanned_dirs, refreshed = scan_and_cache_library(
+            args.manual_dir, report=report, batch_size=args.batch_size)
+        conn.send(("done", is_append, scanned_dirs, sorted(refreshed)))
+    except BrokenPipeError:
+        # The GUI cancelled the scan
+        return 1
+    except Exception as e:
+        logging.exception("Library scan failed")
+        conn.send(("error", str(e)))
+        return 1
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
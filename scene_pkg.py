@@ -0,0 +1,235 @@
+"""Preflight checks and metadata for workshop items, read straight from their files.
+
+A scene.pkg starts with a length-prefixed version string ("PKGV0001", ...),
+an entry count and, for every entry, a length-prefixed name followed by the
+offset (from the end of this header) and length of its data. The header is
+read through mmap so only its pages are touched, however big the payload;
+entries are stored uncompressed, so scene.json can be sliced out directly.
+A video's size comes from the track header ("tkhd") box of its MP4 file.
+"""
+
+import os
+import json
+import mmap
+import struct
+
+PACKAGE_NAME = "scene.pkg"
+MAX_ENTRIES = 1 << 20
+MAX_NAME_LENGTH = 4096
+
+
+class PackageError(ValueError):
+    pass
+
+
+def read_package(path):
+    """Return ``(version, entries)`` of the package at ``path``.
+
+    ``entries`` maps names to ``(offset, length)`` with absolute offsets.
+    Raises PackageError if the header is malformed or an entry runs past the
+    end of the file, as it does in a partial download.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            raise PackageError("file is empty")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return parse_header(data, size)
+
+
+def parse_header(data, size):
+    pos = 0
+
+    def u32():
+        nonlocal pos
+        if pos + 4 > size:
+            raise PackageError("header is cut off")
+        (value,) = struct.unpack_from("<I", data, pos)
+        pos += 4
+        return value
+
+    def string():
+        nonlocal pos
+        length = u32()
+        if length > MAX_NAME_LENGTH or pos + length > size:
+            raise PackageError("header is cut off")
+        value = bytes(data[pos:pos + length]).decode("utf-8", "replace")
+        pos += length
+        return value
+
+    version = string()
+    if not version.startswith("PKGV"):
+        raise PackageError(f"not a scene package (starts with {version[:16]!r})")
+    count = u32()
+    if count > MAX_ENTRIES:
+        raise PackageError(f"implausible entry count {count}")
+    table = [(string(), u32(), u32()) for _ in range(count)]
+    entries = {}
+    for name, offset, length in table:
+        start = pos + offset
+        if start + length > size:
+            raise PackageError(f"{name} is cut off ({size} of {start + length} bytes present)")
+        entries[name] = (start, length)
+    return version, entries
+
+
+def read_entry(path, entries, name):
+    """Bytes of entry ``name`` of the package at ``path``, given its ``entries``."""
+    offset, length = entries[name]
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read(length)
+
+
+def scene_resolution(scene_json):
+    """``(width, height)`` of the orthographic projection in scene.json bytes, or None."""
+    try:
+        scene = json.loads(scene_json)
+        projection = scene["general"]["orthogonalprojection"]
+        size = int(projection["width"]), int(projection["height"])
+    except (ValueError, KeyError, TypeError):
+        return None
+    return size if size[0] > 0 and size[1] > 0 else None
+
+
+def iter_boxes(f, start, end):
+    """Yield ``(type, payload_start, payload_end)`` of the MP4 boxes in ``f[start:end]``."""
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        header = f.read(16)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack_from(">I4s", header)
+        payload = pos + 8
+        if size == 1:
+            if len(header) < 16:
+                return
+            (size,) = struct.unpack_from(">Q", header, 8)
+            payload = pos + 16
+        elif size == 0:
+            size = end - pos
+        if size < payload - pos:
+            return
+        yield box_type, payload, min(pos + size, end)
+        pos += size
+
+
+def video_resolution(path):
+    """``(width, height)`` of the first video track of the MP4 at ``path``, or None.
+
+    Only box headers and the track headers are read, not the media data.
+    """
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            for box_type, start, end in iter_boxes(f, 0, size):
+                if box_type != b"moov":
+                    continue
+                for trak_type, trak_start, trak_end in iter_boxes(f, start, end):
+                    if trak_type != b"trak":
+                        continue
+                    for tkhd_type, tkhd_start, tkhd_end in iter_boxes(f, trak_start, trak_end):
+                        if tkhd_type != b"tkhd":
+                            continue
+                        f.seek(tkhd_start)
+                        tkhd = f.read(tkhd_end - tkhd_start)
+                        # Width and height are 16.16 fixed point after the matrix
+                        offset = 88 if tkhd[:1] == b"\x01" else 76
+                        if len(tkhd) < offset + 8:
+                            continue
+                        width, height = struct.unpack_from(">II", tkhd, offset)
+                        # Audio tracks have a zero size
+                        if width >> 16 and height >> 16:
+                            return width >> 16, height >> 16
+    except OSError:
+        pass
+    return None
+
+
+def preflight(path, project=None):
+    """:func:`check_wallpaper`, also returning the parsed project and the package's entries."""
+    if project is None:
+        try:
+            with open(os.path.join(path, "project.json"), "r", encoding="utf-8") as f:
+                project = json.load(f)
+        except OSError as e:
+            return f"project.json can't be read: {e.strerror}", None, {}
+        except ValueError:
+            return "project.json is not valid JSON", None, {}
+        if not isinstance(project, dict):
+            return "project.json is not valid JSON", None, {}
+
+    entries = {}
+    package = os.path.join(path, PACKAGE_NAME)
+    if os.path.isfile(package):
+        try:
+            _, entries = read_package(package)
+        except (OSError, ValueError) as e:
+            return f"{PACKAGE_NAME}: {e}", project, {}
+
+    main = project.get("file")
+    if isinstance(main, str) and main:
+        if main not in entries and not os.path.isfile(os.path.join(path, main)):
+            return f"{main} is missing", project, entries
+    return None, project, entries
+
+
+def check_wallpaper(path, project=None):
+    """Return why the wallpaper folder ``path`` can't be started, or None if it looks fine.
+
+    Checks that project.json parses, that scene.pkg (if any) has a sound
+    header and that the file project.json names exists on disk or in the
+    package. The payload itself is not read. ``project`` skips reading
+    project.json when it has already been parsed.
+    """
+    return preflight(path, project)[0]
+
+
+def inspect_wallpaper(path, project=None):
+    """Return ``(problem, resolution)`` for the wallpaper folder ``path``.
+
+    Runs :func:`check_wallpaper`, then reads ``(width, height)`` from
+    scene.json or the MP4 track header where it can; resolution is None
+    otherwise. Unlike the check this reads the payload, so it belongs in
+    the library scan, not on the way to starting a wallpaper.
+    ``project`` may be the parsed project.json or the library entry made
+    from it (only "file" and "type" are used).
+    """
+    problem, project, entries = preflight(path, project)
+    if problem:
+        return problem, None
+    main = project.get("file")
+    if not isinstance(main, str) or not main:
+        return None, None
+    package = os.path.join(path, PACKAGE_NAME)
+    try:
+        if main in entries:
+            return None, scene_resolution(read_entry(package, entries, main))
+        wallpaper_type = str(project.get("type") or "").lower()
+        if wallpaper_type == "scene":
+            with open(os.path.join(path, main), "rb") as f:
+                return None, scene_resolution(f.read())
+        if wallpaper_type == "video":
+            return None, video_resolution(os.path.join(path, main))
+    except OSError:
+        pass
+    return None, None
+
+
+
+def inspection_key(path, project):
+    """``[mtime_ns, size]`` of the main file and of scene.pkg (None where missing).
+
+    An inspection stored with the same key, and the same "file" and "type",
+    is still valid.
+    """
+    key = []
+    main = project.get("file")
+    for name in (main if isinstance(main, str) and main else None, PACKAGE_NAME):
+        try:
+            st = os.stat(os.path.join(path, name)) if name else None
+        except OSError:
+            st = None
+        key.append([st.st_mtime_ns, st.st_size] if st else None)
+    return key
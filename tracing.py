@@ -0,0 +1,134 @@
+"""Opt-in span tracing, exported as Chrome trace-event JSON.
+
+Set ``WPE_GUI_TRACE=/path/to/trace.json`` (or pass ``--trace`` to the GUI) and
+open the file written at exit in https://ui.perfetto.dev or chrome://tracing.
+While tracing is off, ``span()`` returns a shared no-op object, so spans can
+stay in hot paths.
+"""
+
+import os
+import json
+import atexit
+import functools
+import logging
+import threading
+import time
+
+TRACE_ENV = "WPE_GUI_TRACE"
+
+_lock = threading.Lock()
+_events = []
+_thread_names = {}
+_path = None
+
+
+def _now_us():
+    return time.perf_counter_ns() // 1000
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = _now_us()
+        return self
+
+    def __exit__(self, *exc):
+        _record({
+            "name": self.name,
+            "ph": "X",
+            "ts": self.start,
+            "dur": _now_us() - self.start,
+            "args": self.args,
+        })
+        return False
+
+    def set(self, **args):
+        """Attach more arguments, e.g. counts only known at the end of the span."""
+        self.args.update(args)
+
+
+def _record(event):
+    thread = threading.current_thread()
+    event["pid"] = os.getpid()
+    event["tid"] = thread.native_id
+    with _lock:
+        _events.append(event)
+        _thread_names.setdefault(thread.native_id, thread.name)
+
+
+def enabled():
+    return _path is not None
+
+
+def enable(path):
+    """Start recording; the trace is written to ``path`` at exit."""
+    global _path
+    if _path is None:
+        atexit.register(write)
+    _path = str(path)
+
+
+def span(name, **args):
+    """Context manager timing the enclosed block as one trace event."""
+    if _path is None:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def traced(name):
+    """Decorator recording every call of the function as a span called ``name``."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _path is None:
+                return func(*args, **kwargs)
+            with _Span(name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def instant(name, **args):
+    if _path is not None:
+        _record({"name": name, "ph": "i", "s": "t", "ts": _now_us(), "args": args})
+
+
+def write(path=None):
+    path = path or _path
+    if path is None:
+        return
+    with _lock:
+        events = list(_events)
+        names = dict(_thread_names)
+    pid = os.getpid()
+    metadata = [
+        {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+        for tid, name in names.items()
+    ]
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f)
+        logging.info("Wrote %d trace events to %s", len(events), path)
+    except OSError as e:
+        logging.error("Failed to write trace %s: %s", path, e)
+
+
+if os.getenv(TRACE_ENV):
+    enable(os.environ[TRACE_ENV])
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""Headless owner of the wallpaper backend with a Unix-socket control API.
+
+``wallpaper_daemon.py serve`` runs the daemon; every other subcommand is a
+thin client that sends one request and prints the reply. The client path
+only needs the standard library so it returns in milliseconds.
+
+Requests and replies are single-line JSON objects, e.g.
+``{"cmd": "set", "settings": {"background_id": "123"}}`` ->
+``{"ok": true, ...}``. Commands: set, stop, pause, resume, status, list.
+"""
+
+import sys
+import os
+import json
+import signal
+import argparse
+import logging
+import threading
+
+import ipc
+
+
+class WallpaperDaemon:
+    def __init__(self, socket_path=ipc.DAEMON_SOCKET):
+        from config_store import WallpaperSettingsStore, read_config
+        from process_manager import WallpaperProcessManager
+
+        self.socket_path = socket_path
+        self.config = read_config()
+        self.wallpaper_settings = WallpaperSettingsStore(legacy=self.config)
+        self.manager = WallpaperProcessManager(
+            log_settings={
+                "max_bytes": int(self.config.get("log_max_mb", 10)) * 1024 * 1024,
+                "backup_count": int(self.config.get("log_backup_count", 3)),
+                "compress": bool(self.config.get("log_compress", True)),
+            },
+        )
+        self.current = None
+        self.last_exit = None
+        self.wallpapers = None
+        self.lock = threading.Lock()
+        self.server = None
+        self._stop_event = threading.Event()
+
+    def handle(self, request):
+        handler = getattr(self, f"cmd_{request.get('cmd')}", None)
+        if handler is None:
+            return {"ok": False, "error": f"Unknown command: {request.get('cmd')}"}
+        # Handlers take self.lock only around the process manager and
+        # current state, so a library scan doesn't hold up stop or status
+        try:
+            return handler(request)
+        except Exception as e:
+            logging.error("Daemon command %s failed: %s", request.get("cmd"), e)
+            return {"ok": False, "error": str(e)}
+
+    def cmd_set(self, request):
+        from process_manager import build_wallpaper_command
+
+        settings = dict(self.config.get("last_wallpaper", {}))
+        settings.setdefault("scale", self.config.get("scale", "default"))
+        settings.setdefault("clamp", self.config.get("clamp", "clamp"))
+        settings.update(request.get("settings") or {})
+        wallpaper_id = str(settings.get("background_id", "")).strip()
+        if not wallpaper_id:
+            return {"ok": False, "error": "No wallpaper id given"}
+        problem = self.preflight(wallpaper_id)
+        if problem:
+            # Keep the current wallpaper rather than replace it with a crash
+            return {"ok": False, "error": f"{wallpaper_id} can't be started: {problem}"}
+        properties = request.get("properties")
+        if properties is None:
+            properties = self.wallpaper_settings.properties(wallpaper_id)
+        options = request.get("options")
+        if options is None:
+            options = self.wallpaper_settings.launch_options(wallpaper_id)
+        cmd = build_wallpaper_command(settings, properties, request.get("geometry"))
+        with self.lock:
+            if not self.manager.is_running():
+                self.manager.kill_orphans()
+            self.manager.restart(cmd, options)
+            self.current = {"settings": settings, "cmd": cmd}
+            self.last_exit = None
+        return {"ok": True, "cmd": cmd}
+
+    def preflight(self, wallpaper_id):
+        from library import get_steam_workshop_dirs, load_library_index
+        from scene_pkg import check_wallpaper
+
+        path = wallpaper_id if os.path.isdir(wallpaper_id) else None
+        if path is None:
+            for w in self.wallpapers or load_library_index():
+                if w["id"] == wallpaper_id:
+                    path = w["path"]
+                    break
+        if path is None:
+            # Not scanned yet; workshop items live in a folder named after their id
+            for w_dir in get_steam_workshop_dirs():
+                if os.path.isdir(os.path.join(w_dir, wallpaper_id)):
+                    path = os.path.join(w_dir, wallpaper_id)
+                    break
+        return check_wallpaper(path) if path else None
+
+    def cmd_stop(self, request):
+        with self.lock:
+            stopping = self.manager.stop_async()
+            if not stopping:
+                self.manager.kill_orphans()
+            self.current = None
+        return {"ok": True, "stopped": stopping}
+
+    def cmd_pause(self, request):
+        with self.lock:
+            return {"ok": self.manager.pause()}
+
+    def cmd_resume(self, request):
+        with self.lock:
+            return {"ok": self.manager.resume()}
+
+    def cmd_status(self, request):
+        with self.lock:
+            self.poll()
+            current = self.current or {}
+            return {
+                "ok": True,
+                "running": self.manager.is_running(),
+                "paused": self.manager.is_paused(),
+                "pid": self.manager.pid(),
+                "wallpaper": current.get("settings", {}).get("background_id"),
+                "cmd": current.get("cmd"),
+                "last_exit": self.last_exit,
+                "log": str(self.manager.log_path()),
+            }
+
+    def cmd_list(self, request):
+        from library import scan_library
+
+        wallpapers = self.wallpapers
+        if wallpapers is None or request.get("refresh"):
+            wallpapers, _, _ = scan_library()
+            self.wallpapers = wallpapers
+        items = [{"id": w["id"], "title": w["title"], "path": w["path"]} for w in wallpapers]
+        return {"ok": True, "wallpapers": items}
+
+    def poll(self):
+        result = self.manager.check()
+        if result is not None and not result["expected"]:
+            logging.error("Wallpaper process exited with code %s", result["returncode"])
+            self.last_exit = result["returncode"]
+            self.current = None
+
+    def _watchdog(self):
+        while not self._stop_event.wait(1.0):
+            with self.lock:
+                self.poll()
+
+    def serve(self):
+        import socketserver
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                line = self.rfile.readline()
+                if not line:
+                    return
+                try:
+                    reply = daemon.handle(ipc.decode_message(line))
+                except ValueError as e:
+                    reply = {"ok": False, "error": f"Bad request: {e}"}
+                self.wfile.write(ipc.encode_message(reply))
+
+        ipc.ensure_runtime_dir()
+        if ipc.is_listening(self.socket_path):
+            logging.error("Daemon already running on %s", self.socket_path)
+            return 1
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+        self.server = socketserver.ThreadingUnixStreamServer(str(self.socket_path), Handler)
+        self.server.daemon_threads = True
+        os.chmod(self.socket_path, 0o600)
+        signal.signal(signal.SIGTERM, lambda *_: self.shutdown())
+        signal.signal(signal.SIGINT, lambda *_: self.shutdown())
+        self.manager.kill_orphans()
+        threading.Thread(target=self._watchdog, name="daemon-watchdog", daemon=True).start()
+        logging.info("Wallpaper daemon listening on %s", self.socket_path)
+        try:
+            self.server.serve_forever()
+        finally:
+            self._stop_event.set()
+            self.manager.stop()
+            self.server.server_close()
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+        return 0
+
+    def shutdown(self):
+        # serve_forever() must be stopped from another thread
+        threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+
+def print_reply(command, reply, as_json):
+    if as_json or not reply.get("ok"):
+        print(json.dumps(reply, indent=2))
+        return
+    if command == "list":
+        for w in reply["wallpapers"]:
+            print(f"{w['id']}\t{w['title']}")
+    elif command == "status":
+        for key in ("running", "paused", "pid", "wallpaper", "last_exit", "log"):
+            print(f"{key}: {reply.get(key)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless control of linux-wallpaperengine")
+    parser.add_argument("--json", action="store_true", help="Print raw JSON replies")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("serve", help="Run the daemon in the foreground")
+    p_set = sub.add_parser("set", help="Set a wallpaper")
+    p_set.add_argument("id", help="Workshop id or path of the wallpaper")
+    p_set.add_argument("--screen", help="Screen to draw on (default: last used)")
+    p_set.add_argument("--silent", action="store_true", default=None, help="Mute audio")
+    p_set.add_argument("--volume", type=int)
+    p_set.add_argument("--fps", type=int)
+    sub.add_parser("stop", help="Stop the wallpaper")
+    sub.add_parser("pause", help="Pause the wallpaper (SIGSTOP)")
+    sub.add_parser("resume", help="Resume a paused wallpaper")
+    sub.add_parser("status", help="Show the daemon's state")
+    p_list = sub.add_parser("list", help="List wallpapers in the library")
+    p_list.add_argument("--refresh", action="store_true", help="Rescan the library first")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        logging.basicConfig(level=logging.INFO, format='[%(asctime)s] [%(levelname)s]:  %(message)s')
+        return WallpaperDaemon().serve()
+
+    request = {"cmd": args.command}
+    if args.command == "set":
+        settings = {"background_id": args.id}
+        for key in ("screen", "silent", "volume", "fps"):
+            if getattr(args, key) is not None:
+                settings[key] = getattr(args, key)
+        request["settings"] = settings
+    elif args.command == "list":
+        request["refresh"] = args.refresh
+
+    try:
+        reply = ipc.send_request(ipc.DAEMON_SOCKET, request, timeout=30 if args.command == "list" else 5)
+    except OSError as e:
+        print(f"Wallpaper daemon is not running ({e}). Start it with: {sys.argv[0]} serve", file=sys.stderr)
+        return 2
+    print_reply(args.command, reply, args.json)
+    return 0 if reply.get("ok") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,28 +1,74 @@
 #!/usr/bin/env python3
 
+import time
+IMPORT_STARTED = time.perf_counter()
+
 import sys
+import errno
+import argparse
+
+import ipc
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="A simple gui for linux-wallpaperengine")
+    parser.add_argument("--background", action="store_true", help="Start the GUI minimized to the tray")
+    parser.add_argument("--debug", action="store_true", help="Enable debug logging")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print import, UI, scan and first-paint times to stderr")
+    parser.add_argument("--memory-profile", action="store_true",
+                        help="Trace allocations; SIGUSR1 writes a snapshot diff to the state directory")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="Write a Chrome trace of scans and wallpaper switches to FILE at exit")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    # Hand over to an already running instance before paying for the Qt imports
+    ARGS = parse_args()
+    try:
+        ipc.send_request(ipc.GUI_SOCKET, {"cmd": "activate", "background": ARGS.background}, timeout=1)
+        sys.exit(0)
+    except OSError as e:
+        # Refused or missing means no instance; anything else is one that is busy or hung
+        if e.errno not in (errno.ECONNREFUSED, errno.ENOENT):
+            sys.exit(f"Another instance is running but did not answer: {e}")
+    except ValueError as e:
+        sys.exit(f"Another instance is running but sent a bad reply: {e}")
+
 import os
-import glob
 import json
 import subprocess
 import shutil
 import re
 import pathlib
 import logging
-import argparse
+import gc
+import threading
+import collections
+import signal
+import socket
 
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QPushButton, QLabel, QLineEdit, QCheckBox, QSlider, QComboBox,
                              QStackedWidget, QListWidget, QListWidgetItem, QSystemTrayIcon,
                              QMenu, QFrame, QSizePolicy, QGraphicsDropShadowEffect,
-                             QStyledItemDelegate, QStyle, QStyleOptionSlider, QFileDialog)
-from PyQt6.QtCore import Qt, QSize, QThread, pyqtSignal, QObject, QTimer, QRect, QPropertyAnimation, QEasingCurve, QVariant, QUrl
-from PyQt6.QtGui import QFont, QIcon, QPixmap, QImage, QAction, QColor, QPainter, QDesktopServices
-from process_manager import WallpaperProcessManager
+                             QStyledItemDelegate, QStyle, QStyleOptionSlider, QStyleOptionViewItem, QFileDialog,
+                             QPlainTextEdit, QTreeWidget, QTreeWidgetItem)
+from PyQt6.QtCore import Qt, QSize, QThreadPool, QRunnable, pyqtSignal, QObject, QTimer, QEvent, QSocketNotifier, QPropertyAnimation, QEasingCurve, QVariant, QUrl
+from PyQt6.QtNetwork import QLocalServer
+from PyQt6.QtGui import QFont, QIcon, QPixmap, QPixmapCache, QImage, QAction, QColor, QPainter, QDesktopServices, QIntValidator, QTextCursor, QTextDocument
+from process_manager import (WallpaperProcessManager, DEFAULT_LAUNCH_OPTIONS, LAUNCH_MARKER,
+                             normalize_launch_options, build_wallpaper_command,
+                             read_rss, trim_heap, parse_properties_output)
+import library
+from library import load_library_index, thumbnail_path, wallpaper_files, prewarm_files
+from scan_worker import scan_and_cache_library, scan_in_subprocess
+from config_store import CONFIG_FILE, ConfigStore, WallpaperSettingsStore, read_config
+import tracing
+from scene_pkg import check_wallpaper
+from library_analysis import analyze_library, disk_usage, format_size
 
-CONFIG_FILE = pathlib.Path(os.getenv("XDG_CONFIG_HOME", os.path.expanduser("~/.config"))) / "linux-wallpaperengine-gui" / "wpe_gui_config.json"
 LOCALE_DIR = (pathlib.Path(__file__).parent / "locales").absolute()
 
 MACOS_DARK = """
@@ -61,19 +107,278 @@ QScrollBar::handle:vertical:hover { background: rgba(255, 255, 255, 0.2); }
 QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical { height: 0px; background: none; }
 QScrollBar::up-arrow:vertical, QScrollBar::down-arrow:vertical { background: none; }
 QScrollBar::add-page:vertical, QScrollBar::sub-page:vertical { background: none; }
+QWidget#LogWindow, QWidget#AnalysisWindow { background-color: #1E1E1E; }
+QScrollBar:horizontal { border: none; background: transparent; height: 10px; margin: 0px; }
+QScrollBar::handle:horizontal { background: rgba(60, 150, 245, 0.75); min-width: 180px; border-radius: 5px; margin: 2px; }
+QScrollBar::add-line:horizontal, QScrollBar::sub-line:horizontal { width: 0px; background: none; }
+QScrollBar::add-page:horizontal, QScrollBar::sub-page:horizontal { background: none; }
+QPlainTextEdit#LogView { background-color: #000000; border: 1px solid #3A3A3A; border-radius: 6px; color: #D0D0D0; font-family: monospace; font-size: 12px; }
+QTreeWidget#AnalysisTree { background-color: #000000; border: 1px solid #3A3A3A; border-radius: 6px; color: #D0D0D0; }
+QTreeWidget#AnalysisTree QHeaderView::section { background-color: #2A2A2A; color: #D0D0D0; border: none; padding: 4px; }
 QLabel#PreviewBox { background-color: #1E1E1E; border: 1px solid #3A3A3A; border-radius: 16px; color: #666666; }
 """
 
-class Worker(QObject):
-    finished = pyqtSignal(object)
-    def __init__(self, func, *args, **kwargs):
+class StartupProfile:
+    """Timestamps of the startup phases, printed once by --profile-startup."""
+    PHASES = (
+        ("imports", "import_start", "imports_done"),
+        ("ui", "ui_start", "ui_done"),
+        ("scan", "scan_start", "scan_done"),
+        ("first paint", "import_start", "first_paint"),
+    )
+
+    def __init__(self, import_started):
+        self.enabled = False
+        self.reported = False
+        self.marks = {"import_start": import_started}
+
+    def mark(self, name):
+        self.marks.setdefault(name, time.perf_counter())
+        if self.enabled and not self.reported and {"scan_done", "first_paint"} <= self.marks.keys():
+            self.reported = True
+            self.report()
+
+    def report(self):
+        parts = []
+        for label, start, end in self.PHASES:
+            if start in self.marks and end in self.marks:
+                parts.append(f"{label} {(self.marks[end] - self.marks[start]) * 1000:.1f} ms")
+        print("Startup profile: " + ", ".join(parts), file=sys.stderr)
+
+STARTUP_PROFILE = StartupProfile(IMPORT_STARTED)
+STARTUP_PROFILE.mark("imports_done")
+
+class TaskCancelled(Exception):
+    pass
+
+class CancelToken:
+    """Cancellation flag shared between the GUI thread and a running task."""
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        """Raise TaskCancelled if the task has been cancelled."""
+        if self._event.is_set():
+            raise TaskCancelled()
+
+class Task(QRunnable):
+    def __init__(self, scheduler, func, args, kwargs, key, on_result, on_error, on_progress=None):
         super().__init__()
+        self.setAutoDelete(False)
+        self.scheduler = scheduler
         self.func = func
         self.args = args
         self.kwargs = kwargs
+        self.key = key
+        self.on_result = on_result
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.token = CancelToken()
+        if on_progress is not None:
+            self.kwargs = dict(kwargs, report=self.report)
+
+    def cancel(self):
+        self.token.cancel()
+
+    def report(self, value):
+        try:
+            self.scheduler.task_progress.emit(self, value)
+        except RuntimeError:
+            pass
+
     def run(self):
-        result = self.func(*self.args, **self.kwargs)
-        self.finished.emit(result)
+        result = error = None
+        if not self.token.cancelled:
+            try:
+                result = self.func(self.token, *self.args, **self.kwargs)
+            except TaskCancelled:
+                pass
+            except Exception as e:
+                logging.exception("Background task %s failed", self.key or self.func.__name__)
+                error = e
+        try:
+            # Queued to the GUI thread, where the scheduler lives
+            self.scheduler.task_done.emit(self, result, error)
+        except RuntimeError:
+            # The scheduler was deleted while the app exited
+            pass
+
+class TaskScheduler(QObject):
+    """Runs functions on a thread pool and delivers their results on the GUI thread.
+
+    Task functions are called as ``func(token, *args, **kwargs)`` and may call
+    ``token.check()`` to stop early once cancelled. Keys are ``(kind, detail)``
+    tuples: a task is coalesced with an unfinished one of the same key, so at
+    most one of them runs and at most one more waits. With ``supersede`` the
+    running task is cancelled instead of waited for. Results of cancelled
+    tasks are dropped. With ``on_progress`` the function also gets a ``report``
+    keyword; every ``report(value)`` reaches ``on_progress`` on the GUI thread.
+    """
+    PRIORITY_UI = 10
+    PRIORITY_NORMAL = 0
+    PRIORITY_IDLE = -10
+
+    task_done = pyqtSignal(object, object, object)
+    task_progress = pyqtSignal(object, object)
+
+    def __init__(self, max_threads=None, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads or max(2, min(4, QThreadPool.globalInstance().maxThreadCount())))
+        self.active = set()
+        self.running = {}
+        self.pending = {}
+        self.priorities = {}
+        self.task_done.connect(self.on_task_done)
+        self.task_progress.connect(self.on_task_progress)
+
+    def submit(self, func, *args, key=None, priority=PRIORITY_NORMAL, on_result=None,
+               on_error=None, on_progress=None, supersede=False, **kwargs):
+        task = Task(self, func, args, kwargs, key, on_result, on_error, on_progress)
+        self.priorities[task] = priority
+        if key is not None:
+            waiting = self.pending.pop(key, None)
+            if waiting is not None:
+                waiting.cancel()
+                self.priorities.pop(waiting, None)
+            current = self.running.get(key)
+            if current is not None:
+                if not supersede:
+                    self.pending[key] = task
+                    return task
+                current.cancel()
+            self.running[key] = task
+        self.start(task)
+        return task
+
+    def start(self, task):
+        self.active.add(task)
+        self.pool.start(task, self.priorities.pop(task, self.PRIORITY_NORMAL))
+
+    def cancel(self, key):
+        for tasks in (self.pending, self.running):
+            task = tasks.pop(key, None)
+            if task is not None:
+                task.cancel()
+                self.priorities.pop(task, None)
+
+    def busy(self, kind):
+        """Whether a task whose key starts with ``kind`` is running or waiting."""
+        return any(key[0] == kind for tasks in (self.running, self.pending) for key in tasks)
+
+    def on_task_progress(self, task, value):
+        if not task.token.cancelled:
+            task.on_progress(value)
+
+    def on_task_done(self, task, result, error):
+        self.active.discard(task)
+        if task.key is not None and self.running.get(task.key) is task:
+            del self.running[task.key]
+            waiting = self.pending.pop(task.key, None)
+            if waiting is not None:
+                self.running[task.key] = waiting
+                self.start(waiting)
+        if task.token.cancelled:
+            return
+        if error is not None:
+            if task.on_error is not None:
+                task.on_error(error)
+        elif task.on_result is not None:
+            task.on_result(result)
+
+    def shutdown(self, timeout_ms=2000):
+        # Not-yet-started tasks are dropped; running ones see their token set
+        self.pool.clear()
+        for task in list(self.active) + list(self.pending.values()):
+            task.cancel()
+        self.pending.clear()
+        return self.pool.waitForDone(timeout_ms)
+
+class ProcessSignals(QObject):
+    # Bridges WallpaperProcessManager callbacks (stop thread) to the GUI thread
+    stopped = pyqtSignal(bool)
+    started = pyqtSignal(object)
+    start_failed = pyqtSignal(str)
+
+class InstanceServer(QObject):
+    """Local socket the running GUI listens on for requests from new launches."""
+    request_received = pyqtSignal(dict)
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.server = QLocalServer(self)
+        try:
+            ipc.ensure_runtime_dir()
+        except OSError as e:
+            logging.error("Failed to create runtime directory: %s", e)
+        if not self.server.listen(str(path)) and ipc.is_stale(path):
+            # Left behind by an instance that didn't exit cleanly
+            QLocalServer.removeServer(str(path))
+            self.server.listen(str(path))
+        if not self.server.isListening():
+            logging.error("Single-instance server failed: %s", self.server.errorString())
+        self.server.newConnection.connect(self.on_new_connection)
+
+    def on_new_connection(self):
+        while self.server.hasPendingConnections():
+            conn = self.server.nextPendingConnection()
+            conn.readyRead.connect(lambda c=conn: self.on_ready_read(c))
+            conn.disconnected.connect(conn.deleteLater)
+
+    def on_ready_read(self, conn):
+        if not conn.canReadLine():
+            return
+        try:
+            request = ipc.decode_message(bytes(conn.readLine()))
+        except ValueError as e:
+            reply = {"ok": False, "error": f"Bad request: {e}"}
+        else:
+            self.request_received.emit(request)
+            reply = {"ok": True}
+        conn.write(ipc.encode_message(reply))
+        conn.flush()
+        conn.disconnectFromServer()
+
+    def close(self):
+        self.server.close()
+
+class UnixSignalNotifier(QObject):
+    """Delivers Unix signals to the Qt event loop.
+
+    Python only runs signal handlers between bytecodes, which never happens
+    while Qt sits in its C++ event loop; the wakeup fd wakes a socket
+    notifier instead.
+    """
+    received = pyqtSignal(int)
+
+    def __init__(self, signums, parent=None):
+        super().__init__(parent)
+        self.signums = set(signums)
+        self.rsock, self.wsock = socket.socketpair()
+        self.rsock.setblocking(False)
+        self.wsock.setblocking(False)
+        signal.set_wakeup_fd(self.wsock.fileno())
+        for signum in self.signums:
+            # A Python-level handler is needed for the wakeup byte to be written
+            signal.signal(signum, lambda *_: None)
+        self.notifier = QSocketNotifier(self.rsock.fileno(), QSocketNotifier.Type.Read, self)
+        self.notifier.activated.connect(self.on_activated)
+
+    def on_activated(self):
+        try:
+            data = self.rsock.recv(64)
+        except BlockingIOError:
+            return
+        for signum in data:
+            if signum in self.signums:
+                self.received.emit(signum)
 
 class I18n:
     def __init__(self):
@@ -95,9 +400,86 @@ class I18n:
         if kwargs: return text.format(**kwargs)
         return text
 
+# Item role holding the path of the cached thumbnail, looked up on paint
+THUMBNAIL_ROLE = Qt.ItemDataRole.UserRole + 1
+# Why the wallpaper failed its preflight check, if it did
+PROBLEM_ROLE = Qt.ItemDataRole.UserRole + 2
+
+class ThumbnailCache:
+    """Byte-budgeted LRU of thumbnail pixmaps, loaded from the disk cache on demand.
+
+    Cards painted in the latest full repaint of the grid are pinned, so
+    eviction only drops thumbnails that have been scrolled out of view.
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.pixmaps = collections.OrderedDict()
+        self.size_bytes = 0
+        self.pinned = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def cost(pixmap):
+        return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+    def get(self, path):
+        self.pinned.add(path)
+        pixmap = self.pixmaps.get(path)
+        if pixmap is not None:
+            self.hits += 1
+            self.pixmaps.move_to_end(path)
+            return pixmap
+        self.misses += 1
+        # A missing file is cached as a null pixmap until invalidate()
+        pixmap = QPixmap(path)
+        self.pixmaps[path] = pixmap
+        self.size_bytes += self.cost(pixmap)
+        self.evict()
+        return pixmap
+
+    def evict(self):
+        if self.size_bytes <= self.budget_bytes:
+            return
+        for path in list(self.pixmaps):
+            if path in self.pinned:
+                continue
+            self.size_bytes -= self.cost(self.pixmaps.pop(path))
+            self.evictions += 1
+            if self.size_bytes <= self.budget_bytes:
+                break
+
+    def new_frame(self):
+        self.pinned.clear()
+
+    def invalidate(self, path):
+        pixmap = self.pixmaps.pop(path, None)
+        if pixmap is not None:
+            self.size_bytes -= self.cost(pixmap)
+
+    def clear(self):
+        self.pixmaps.clear()
+        self.pinned.clear()
+        self.size_bytes = 0
+
+    def stats(self):
+        return {
+            "entries": len(self.pixmaps),
+            "bytes": self.size_bytes,
+            "budget_bytes": self.budget_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
 class WallpaperDelegate(QStyledItemDelegate):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, thumbnail_cache=None):
         super().__init__(parent)
+        self.thumbnail_cache = thumbnail_cache
+        if parent is not None:
+            parent.viewport().installEventFilter(self)
         self.scales = {}
         self.current_scales = {}
         self.timer = QTimer()
@@ -119,6 +501,25 @@ class WallpaperDelegate(QStyledItemDelegate):
         if changed and self.parent():
             self.parent().viewport().update()
 
+    def eventFilter(self, obj, event):
+        # A full repaint starts a new set of visible (pinned) thumbnails
+        if (self.thumbnail_cache is not None and event.type() == QEvent.Type.Paint
+                and event.rect().contains(obj.rect())):
+            self.thumbnail_cache.new_frame()
+        return super().eventFilter(obj, event)
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        path = index.data(THUMBNAIL_ROLE)
+        if path and self.thumbnail_cache is not None:
+            pixmap = self.thumbnail_cache.get(path)
+            if not pixmap.isNull():
+                option.icon = QIcon(pixmap)
+                option.features |= QStyleOptionViewItem.ViewItemFeature.HasDecoration
+        if index.data(PROBLEM_ROLE):
+            # The tooltip says what's wrong
+            option.text = "⚠ " + option.text
+
     def paint(self, painter, option, index):
         painter.save()
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
@@ -149,15 +550,23 @@ class WallpaperDelegate(QStyledItemDelegate):
         super().paint(painter, option, index)
         painter.restore()
 
-class WallpaperChangeHandler(FileSystemEventHandler):
-    def __init__(self, signal):
-        self.signal = signal
+def create_change_handler(signal):
+    # watchdog is only needed once the first scan has finished, so it isn't
+    # imported at startup
+    from watchdog.events import FileSystemEventHandler
 
-    def on_any_event(self, event):
-        if event.is_directory:
-            return
-        # Trigger update on file changes (creation, deletion, modification)
-        self.signal.emit()
+    class WallpaperChangeHandler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if event.is_directory:
+                return
+            # Newer watchdog also reports plain reads; the scan itself opens
+            # every project.json and would otherwise retrigger itself forever
+            if event.event_type in ("opened", "closed_no_write"):
+                return
+            # Trigger update on file changes (creation, deletion, modification)
+            signal.emit()
+
+    return WallpaperChangeHandler()
 
 class LibraryWatcher(QObject):
     # Signal to notify the app that the library needs refreshing (debounced)
@@ -165,10 +574,11 @@ class LibraryWatcher(QObject):
     # Internal signal from worker thread
     _raw_change = pyqtSignal()
 
-    def __init__(self):
+    def __init__(self, scheduler=None):
         super().__init__()
-        self.observer = Observer()
-        self.handler = WallpaperChangeHandler(self._raw_change)
+        self.scheduler = scheduler
+        self.observer = None
+        self.handler = None
         self.watched_paths = set()
 
         # Debounce timer
@@ -188,32 +598,221 @@ class LibraryWatcher(QObject):
         new_paths = set(directories)
         if new_paths == self.watched_paths:
             return
+        self.watched_paths = new_paths
 
-        if self.observer.is_alive():
-            self.observer.stop()
-            self.observer.join()
+        if self.handler is None:
+            self.handler = create_change_handler(self._raw_change)
+        if self.scheduler is None:
+            self.set_observer(self.start_observer(None, list(directories)))
+        else:
+            # Recursive inotify watches walk the whole library; keep that off the GUI thread
+            self.scheduler.submit(self.start_observer, list(directories), key=("watch", None),
+                                  priority=TaskScheduler.PRIORITY_IDLE, on_result=self.set_observer)
 
-        self.observer = Observer()
-        self.watched_paths = new_paths
+    def start_observer(self, token, directories):
+        from watchdog.observers import Observer
 
+        observer = Observer()
         for d in directories:
             if os.path.isdir(d):
                 try:
-                    self.observer.schedule(self.handler, d, recursive=True)
+                    observer.schedule(self.handler, d, recursive=True)
                 except Exception as e:
                     print(f"Failed to watch {d}: {e}")
 
         try:
-            self.observer.start()
+            observer.start()
         except Exception as e:
             print(f"Failed to start observer: {e}")
+        if token is not None and token.cancelled:
+            observer.stop()
+            observer.join()
+            return None
+        return observer
+
+    def set_observer(self, observer):
+        self.stop()
+        self.observer = observer
 
     def stop(self):
-        if self.observer.is_alive():
+        if self.observer is not None and self.observer.is_alive():
             self.observer.stop()
             self.observer.join()
 
 
+class LogViewer(QWidget):
+    """Live view of the backend output kept in the manager's ring buffer.
+
+    Only the buffered lines are shown, so opening it costs the same no
+    matter how large the log file on disk is.
+    """
+
+    def __init__(self, manager, i18n, parent=None):
+        super().__init__(parent, Qt.WindowType.Window)
+        self.setObjectName("LogWindow")
+        self.setAttribute(Qt.WidgetAttribute.WA_StyledBackground)
+        self.manager = manager
+        self.i18n = i18n
+        self.seq = 0
+        self.resize(820, 520)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(12, 12, 12, 12)
+        layout.setSpacing(10)
+        self.view = QPlainTextEdit()
+        self.view.setObjectName("LogView")
+        self.view.setReadOnly(True)
+        self.view.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.view.setMaximumBlockCount(manager.log_buffer.maxlen)
+        layout.addWidget(self.view)
+
+        buttons = QHBoxLayout()
+        self.btn_latest = QPushButton()
+        self.btn_latest.setObjectName("SecondaryButton")
+        self.btn_latest.clicked.connect(self.jump_to_latest_launch)
+        self.btn_open_file = QPushButton()
+        self.btn_open_file.setObjectName("SecondaryButton")
+        self.btn_open_file.clicked.connect(self.open_log_file)
+        buttons.addWidget(self.btn_latest)
+        buttons.addStretch()
+        buttons.addWidget(self.btn_open_file)
+        layout.addLayout(buttons)
+
+        # Pull new lines periodically instead of signalling per line;
+        # some scenes print a warning every frame
+        self.timer = QTimer(self)
+        self.timer.setInterval(250)
+        self.timer.timeout.connect(self.poll)
+        self.update_texts()
+
+    def update_texts(self):
+        self.setWindowTitle(self.i18n.get("log_viewer_title"))
+        self.btn_latest.setText(self.i18n.get("jump_latest_launch_button"))
+        self.btn_open_file.setText(self.i18n.get("open_log_file_button"))
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.poll()
+        self.timer.start()
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def poll(self):
+        buffer = self.manager.log_tail() if self.seq == 0 else self.manager.log_buffer
+        self.seq, lines = buffer.lines_since(self.seq)
+        if not lines:
+            return
+        bar = self.view.verticalScrollBar()
+        follow = bar.value() == bar.maximum()
+        self.view.appendPlainText("\n".join(lines))
+        if follow:
+            bar.setValue(bar.maximum())
+
+    def jump_to_latest_launch(self):
+        self.view.moveCursor(QTextCursor.MoveOperation.End)
+        if self.view.find(LAUNCH_MARKER, QTextDocument.FindFlag.FindBackward):
+            # Scroll bar units are lines when wrapping is off
+            self.view.verticalScrollBar().setValue(self.view.textCursor().blockNumber())
+
+    def open_log_file(self):
+        log_path = self.manager.log_path()
+        if log_path.exists():
+            QDesktopServices.openUrl(QUrl.fromLocalFile(str(log_path)))
+
+class SizeTreeItem(QTreeWidgetItem):
+    """Sorts by the byte count behind the size column rather than its text."""
+
+    def __lt__(self, other):
+        column = self.treeWidget().sortColumn()
+        if column == 1:
+            return (self.data(1, Qt.ItemDataRole.UserRole) or 0) < (other.data(1, Qt.ItemDataRole.UserRole) or 0)
+        return super().__lt__(other)
+
+
+class LibraryAnalysisView(QWidget):
+    """Duplicate groups and the largest wallpapers from a library analysis.
+
+    Double-clicking a row emits ``wallpaper_activated`` with its folder.
+    """
+
+    wallpaper_activated = pyqtSignal(str)
+
+    def __init__(self, i18n, parent=None):
+        super().__init__(parent, Qt.WindowType.Window)
+        self.setObjectName("AnalysisWindow")
+        self.setAttribute(Qt.WidgetAttribute.WA_StyledBackground)
+        self.i18n = i18n
+        self.result = None
+        self.resize(820, 620)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(12, 12, 12, 12)
+        layout.setSpacing(10)
+        self.summary = QLabel()
+        self.summary.setProperty("class", "CardTitle")
+        layout.addWidget(self.summary)
+        self.duplicates_label = QLabel()
+        layout.addWidget(self.duplicates_label)
+        self.duplicates = self.make_tree()
+        layout.addWidget(self.duplicates)
+        self.largest_label = QLabel()
+        layout.addWidget(self.largest_label)
+        self.largest = self.make_tree()
+        self.largest.setRootIsDecorated(False)
+        layout.addWidget(self.largest)
+        self.update_texts()
+
+    def make_tree(self):
+        tree = QTreeWidget()
+        tree.setObjectName("AnalysisTree")
+        tree.setColumnCount(3)
+        tree.setColumnWidth(0, 260)
+        tree.setColumnWidth(1, 90)
+        tree.setSortingEnabled(True)
+        tree.itemDoubleClicked.connect(
+            lambda item: self.wallpaper_activated.emit(item.data(2, Qt.ItemDataRole.UserRole)))
+        return tree
+
+    def make_row(self, title, size, path, label=None):
+        row = SizeTreeItem([title, format_size(size), label or path])
+        row.setData(1, Qt.ItemDataRole.UserRole, size)
+        row.setData(2, Qt.ItemDataRole.UserRole, path)
+        return row
+
+    def set_result(self, result):
+        self.result = result
+        titles = {item["path"]: item["title"] for item in result["items"]}
+        self.duplicates.clear()
+        for group in result["duplicates"]:
+            first = group["paths"][0]
+            label = self.i18n.get("analysis_group").format(
+                count=len(group["paths"]), wasted=format_size(group["wasted"]))
+            node = self.make_row(titles[first], group["wasted"], first, label)
+            for path in group["paths"]:
+                node.addChild(self.make_row(titles[path], group["size"], path))
+            self.duplicates.addTopLevelItem(node)
+        self.duplicates.sortItems(1, Qt.SortOrder.DescendingOrder)
+        self.largest.clear()
+        self.largest.addTopLevelItems([self.make_row(i["title"], i["size"], i["path"]) for i in result["items"]])
+        self.largest.sortItems(1, Qt.SortOrder.DescendingOrder)
+        self.update_texts()
+
+    def update_texts(self):
+        self.setWindowTitle(self.i18n.get("analysis_title"))
+        headers = [self.i18n.get("analysis_column_title"), self.i18n.get("analysis_column_size"),
+                   self.i18n.get("analysis_column_path")]
+        self.duplicates.setHeaderLabels(headers)
+        self.largest.setHeaderLabels(headers)
+        self.duplicates_label.setText(self.i18n.get("analysis_duplicates"))
+        self.largest_label.setText(self.i18n.get("analysis_largest"))
+        if self.result is not None:
+            self.summary.setText(self.i18n.get("analysis_summary").format(
+                count=len(self.result["items"]), total=format_size(self.result["total"]),
+                groups=len(self.result["duplicates"]),
+                wasted=format_size(sum(d["wasted"] for d in self.result["duplicates"]))))
+
 class ClickableSlider(QSlider):
 
     def mousePressEvent(self, signal):
@@ -227,45 +826,164 @@ class ClickableSlider(QSlider):
         super().mousePressEvent(signal)
 
 class WallpaperApp(QMainWindow):
-    def __init__(self):
+    def __init__(self, background=False):
         super().__init__()
+        self.startup_time = time.perf_counter()
+        self.first_card_reported = False
         self.i18n = I18n()
         self.translatable_labels = []
         self.properties_data = {}
+        self.config_store = ConfigStore(CONFIG_FILE)
         self.load_config_data()
         self.i18n.load(self.config.get("current_language", "en"))
         self._ = self.i18n.get
         self.setWindowTitle(f"{self._('app_title')} [build: props-ui-1]")
         self.setFixedSize(900, 900)
+        self.status_bar = self.statusBar()
+        self.status_bar.hide()
+        self.screens = None
+        self.ui_ready = False
+        self.library_released = False
+        self.thumbnail_cache = ThumbnailCache(int(self.config.get("thumbnail_cache_mb", 64)) * 1024 * 1024)
+        # Drop the grid and its thumbnails after the window has been hidden
+        # this long; 0 keeps them in memory
+        self.release_timer = QTimer(self)
+        self.release_timer.setSingleShot(True)
+        self.release_timer.setInterval(int(self.config.get("tray_release_minutes", 5)) * 60 * 1000)
+        self.release_timer.timeout.connect(self.release_library)
+        self.scheduler = TaskScheduler(parent=self)
+        # Facet sets and id -> card of everything in the grid, for filtering
+        self.facets = library.FacetIndex()
+        self.wallpaper_items = {}
+        self.facet_selection = dict(self.config.get("facet_filters") or {})
+        # Folders picked with "Select Folder" this session, for the library analysis
+        self.manual_dirs = set()
+        self.analysis_view = None
+        # Disk usage by folder for the "Size" sort; measured only when that
+        # sort is used, or by the library analysis
+        self.folder_sizes = {}
+
+        self.proc_signals = ProcessSignals()
+        self.proc_signals.stopped.connect(self.on_wallpaper_stopped)
+        self.proc_signals.start_failed.connect(self.on_wallpaper_start_failed)
+        self.wallpaper_proc_manager = WallpaperProcessManager(
+            on_stopped=self.proc_signals.stopped.emit,
+            on_started=self.proc_signals.started.emit,
+            on_start_failed=lambda e: self.proc_signals.start_failed.emit(str(e)),
+            log_settings={
+                "max_bytes": int(self.config.get("log_max_mb", 10)) * 1024 * 1024,
+                "backup_count": int(self.config.get("log_backup_count", 3)),
+                "compress": bool(self.config.get("log_compress", True)),
+            },
+            log_buffer_lines=int(self.config.get("log_view_lines", 5000)),
+        )
+        self.log_viewer = None
+        self.wallpaper_watchdog = QTimer()
+        self.wallpaper_watchdog.setInterval(1000)
+        self.wallpaper_watchdog.timeout.connect(self.check_wallpaper_process)
+        self.wallpaper_watchdog.start()
+
+        self.setup_tray()
+        self.instance_server = InstanceServer(ipc.GUI_SOCKET, self)
+        self.instance_server.request_received.connect(self.on_instance_request)
+
+        if background:
+            # Autostart: get the wallpaper on screen first; the window and
+            # library scan are built when the user opens them from the tray
+            self.restore_wallpaper_fast()
+        else:
+            self.ensure_ui()
+            QTimer.singleShot(500, self.restore_last_wallpaper)
+
+    def ensure_ui(self):
+        if self.ui_ready:
+            return
+        self.ui_ready = True
+        STARTUP_PROFILE.mark("ui_start")
         self.setup_ui()
         self.apply_theme()
         self.apply_config_ui()
-        self.setup_tray()
+        # Show the last known library right away; the scan reconciles it
+        self.load_cached_library()
         self.start_scan()
         self.stack.setCurrentIndex(1)
         self.nav_bar.setCurrentRow(1)
-        self.screens = self.detect_screens()
+        if self.screens is None:
+            self.screens = self.detect_screens()
         for s in self.screens:
             self.screen_combo.addItem(s["name"], s)
         self.update_texts()
 
         # Setup file watcher for auto-refresh
-        self.watcher = LibraryWatcher()
+        self.watcher = LibraryWatcher(self.scheduler)
         self.watcher.library_changed.connect(self.on_library_changed_auto)
-
-        QTimer.singleShot(500, self.restore_last_wallpaper)
-
-        self.wallpaper_proc_manager = WallpaperProcessManager()
-        self.wallpaper_watchdog = QTimer()
-        self.wallpaper_watchdog.setInterval(1000)
-        self.wallpaper_watchdog.timeout.connect(self.check_wallpaper_process)
-        self.wallpaper_watchdog.start()
+        STARTUP_PROFILE.mark("ui_done")
+        if STARTUP_PROFILE.enabled:
+            self.list_wallpapers.viewport().installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint and obj is self.list_wallpapers.viewport():
+            obj.removeEventFilter(self)
+            STARTUP_PROFILE.mark("first_paint")
+        return super().eventFilter(obj, event)
+
+    def show_window(self):
+        if not self.ui_ready:
+            self.startup_time = time.perf_counter()
+            self.ensure_ui()
+            # The wallpaper is already running; only fill in the controls
+            QTimer.singleShot(0, lambda: self.restore_last_wallpaper(launch=False))
+        self.showNormal()
+        self.raise_()
+        self.activateWindow()
 
     def on_library_changed_auto(self):
-        # Trigger a scan if one isn't already running
-        if self.btn_scan.isEnabled():
+        # Changes during a scan queue one more scan; a released library is
+        # rescanned when the window is shown again
+        if not self.library_released:
             self.start_scan()
 
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.release_timer.stop()
+        if self.library_released:
+            self.restore_library()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        if self.ui_ready and self.release_timer.interval() > 0:
+            self.release_timer.start()
+
+    def release_library(self):
+        if self.library_released or self.isVisible():
+            return
+        rss_before = read_rss()
+        logging.debug("Thumbnail cache: %s", self.thumbnail_cache.stats())
+        self.library_released = True
+        self.scheduler.cancel(("sort", None))
+        self.list_wallpapers.clear()
+        self.facets.clear()
+        self.wallpaper_items.clear()
+        self.thumbnail_cache.clear()
+        QPixmapCache.clear()
+        gc.collect()
+        trim_heap()
+        rss_after = read_rss()
+        if rss_before is not None and rss_after is not None:
+            logging.info("Released library while hidden: RSS %.1f MB -> %.1f MB",
+                         rss_before / 2**20, rss_after / 2**20)
+
+    def restore_library(self):
+        self.library_released = False
+        self.load_cached_library()
+        selected_id = self.wp_id_input.text().strip()
+        for i in range(self.list_wallpapers.count()):
+            item = self.list_wallpapers.item(i)
+            if item.data(Qt.ItemDataRole.UserRole)["id"] == selected_id:
+                self.list_wallpapers.setCurrentItem(item)
+                break
+        self.start_scan()
+
     def setup_ui(self):
         main_widget = QWidget()
         self.setCentralWidget(main_widget)
@@ -309,9 +1027,7 @@ class WallpaperApp(QMainWindow):
         self.page_library = QWidget()
         self.setup_library_page()
         self.stack.addWidget(self.page_library)
-        self.status_bar = self.statusBar()
         self.status_bar.showMessage("Ready")
-        self.status_bar.hide()
 
     def setup_control_page(self):
         layout = QVBoxLayout(self.page_control)
@@ -355,12 +1071,34 @@ class WallpaperApp(QMainWindow):
         self.chk_parallax.clicked.connect(self.run_wallpaper)
         self.chk_fs_pause = QCheckBox("no_fullscreen_pause_checkbox")
         self.chk_fs_pause.clicked.connect(self.run_wallpaper)
+        self.slider_nice = ClickableSlider(Qt.Orientation.Horizontal)
+        self.slider_nice.setRange(0, 19)
+        self.slider_nice.setValue(0)
+        self.slider_nice.sliderReleased.connect(self.run_wallpaper)
+        self.combo_io_class = QComboBox()
+        self.combo_io_class.addItems(['default', 'best-effort', 'idle'])
+        self.combo_io_class.currentTextChanged.connect(self.run_wallpaper)
+        self.input_cpu_affinity = QLineEdit()
+        self.input_cpu_affinity.editingFinished.connect(self.on_launch_option_edited)
+        self.input_memory_limit = QLineEdit()
+        self.input_memory_limit.setValidator(QIntValidator(0, 1048576))
+        self.input_memory_limit.editingFinished.connect(self.on_launch_option_edited)
         l = card_perf.layout()
-        l.addWidget(self.create_label("fps_label"))
-        l.addWidget(self.slider_fps)
+        # Tighter than the other cards so the launch options fit
+        l.setSpacing(6)
+        self.add_form_row(card_perf, "fps_label", self.slider_fps)
         l.addWidget(self.chk_mouse)
         l.addWidget(self.chk_parallax)
         l.addWidget(self.chk_fs_pause)
+        self.add_form_row(card_perf, "nice_label", self.slider_nice)
+        # I/O class and CPU cores share a line to keep the card short
+        resources = QHBoxLayout()
+        for key, widget in (("io_class_label", self.combo_io_class),
+                            ("cpu_affinity_label", self.input_cpu_affinity)):
+            resources.addWidget(self.create_label(key))
+            resources.addWidget(widget, 1)
+        l.addLayout(resources)
+        self.add_form_row(card_perf, "memory_limit_label", self.input_memory_limit)
         card_adv = self.create_card(layout, "adv_frame")
         self.combo_scaling = QComboBox()
         self.combo_scaling.addItems(['default', 'stretch', 'fit', 'fill'])
@@ -458,7 +1196,7 @@ class WallpaperApp(QMainWindow):
         layout.setContentsMargins(12, 24, 0, 0)
         layout.setSpacing(0)
         push_buttons_layout = QHBoxLayout()
-        push_buttons_layout.setContentsMargins(165, 0, 0, 0)
+        push_buttons_layout.setContentsMargins(80, 0, 0, 0)
         push_buttons_layout.setAlignment(Qt.AlignmentFlag.AlignLeft)
         header = QHBoxLayout()
         self.btn_scan = QPushButton("scan_local_wallpapers_button")
@@ -479,6 +1217,12 @@ class WallpaperApp(QMainWindow):
         self.btn_select_folder.setCursor(Qt.CursorShape.PointingHandCursor)
         push_buttons_layout.addSpacing(25)
         push_buttons_layout.addWidget(self.btn_select_folder)
+        self.btn_analyze = QPushButton("analyze_library_button")
+        self.btn_analyze.clicked.connect(self.start_analysis)
+        self.btn_analyze.setFixedSize(160, 200)
+        self.btn_analyze.setCursor(Qt.CursorShape.PointingHandCursor)
+        push_buttons_layout.addSpacing(25)
+        push_buttons_layout.addWidget(self.btn_analyze)
         layout.addLayout(push_buttons_layout)
         layout.addLayout(header)
         
@@ -487,7 +1231,7 @@ class WallpaperApp(QMainWindow):
         self.search_input.textChanged.connect(self.filter_wallpapers)
         self.search_input.setFixedWidth(350)
         self.sorting_type = QComboBox()
-        self.sorting_type.addItems(["Name", "Subscription Date"])
+        self.sorting_type.addItems(["Name", "Subscription Date", "Size"])
         self.sorting_type.setFixedWidth(150)
         self.sorting_type.setStyleSheet("text-align: left;")
         self.sort_reversed_state = False
@@ -506,6 +1250,21 @@ class WallpaperApp(QMainWindow):
         search_layout.setAlignment(Qt.AlignmentFlag.AlignLeft)
         layout.addLayout(search_layout)
 
+        self.facet_combos = {}
+        self.facet_options = {}
+        facet_layout = QHBoxLayout()
+        facet_layout.setSpacing(11)
+        facet_layout.setContentsMargins(64,10,0,0)
+        for facet in library.FACETS:
+            combo = QComboBox()
+            combo.setFixedWidth(175)
+            combo.currentIndexChanged.connect(lambda index, facet=facet: self.on_facet_change(facet, index))
+            self.facet_combos[facet] = combo
+            self.facet_options[facet] = []
+            facet_layout.addWidget(combo)
+        facet_layout.setAlignment(Qt.AlignmentFlag.AlignLeft)
+        layout.addLayout(facet_layout)
+
         self.list_wallpapers = QListWidget()
         self.list_wallpapers.setMovement(QListWidget.Movement.Static)
         self.list_wallpapers.setObjectName("WallpaperGrid")
@@ -515,7 +1274,7 @@ class WallpaperApp(QMainWindow):
         self.list_wallpapers.setSpacing(100)
         self.list_wallpapers.setWordWrap(True)
         self.list_wallpapers.setIconSize(QSize(150, 170))
-        self.list_wallpapers.setItemDelegate(WallpaperDelegate(self.list_wallpapers))
+        self.list_wallpapers.setItemDelegate(WallpaperDelegate(self.list_wallpapers, self.thumbnail_cache))
         self.list_wallpapers.setMouseTracking(True)
         self.list_wallpapers.itemClicked.connect(self.on_wallpaper_selected)
         self.list_wallpapers.itemDoubleClicked.connect(self.run_wallpaper)
@@ -572,6 +1331,7 @@ class WallpaperApp(QMainWindow):
         self.btn_show_log.setText(self._("show_log_button"))
         self.btn_scan.setText(self._("scan_local_wallpapers_button"))
         self.btn_select_folder.setText(self._("select_folder_button"))
+        self.btn_analyze.setText(self._("analyze_library_button"))
         self.chk_silent.setText(self._("silent_checkbox"))
         self.chk_no_automute.setText(self._("no_automute_checkbox"))
         self.chk_no_proc.setText(self._("no_audio_processing_checkbox"))
@@ -584,7 +1344,14 @@ class WallpaperApp(QMainWindow):
         self.btn_apply_prop.setText(self._("apply_property_button"))
         self.properties_combo.setItemText(0, self._("properties_select_placeholder"))
         self.properties_value.setPlaceholderText(self._("property_value_placeholder"))
+        self.input_cpu_affinity.setPlaceholderText(self._("cpu_affinity_placeholder"))
+        self.input_memory_limit.setPlaceholderText(self._("memory_limit_placeholder"))
         self.search_input.setPlaceholderText(self._("search_placeholder"))
+        self.refresh_facet_combos()
+        if getattr(self, "log_viewer", None) is not None:
+            self.log_viewer.update_texts()
+        if getattr(self, "analysis_view", None) is not None:
+            self.analysis_view.update_texts()
 
     def switch_page(self, row):
         self.stack.setCurrentIndex(row)
@@ -597,195 +1364,295 @@ class WallpaperApp(QMainWindow):
             self.save_config()
 
     def start_scan(self):
+        STARTUP_PROFILE.mark("scan_start")
         self.status_bar.showMessage(self._("status_searching_local"))
         self.btn_scan.setEnabled(False)
         self.search_input.clear()
-        self.thread = QThread()
-        self.worker = Worker(self.scan_logic)
-        self.worker.moveToThread(self.thread)
-        self.thread.started.connect(self.worker.run)
-        self.worker.finished.connect(self.scan_finished)
-        self.worker.finished.connect(self.thread.quit)
-        self.worker.finished.connect(self.worker.deleteLater)
-        self.thread.finished.connect(self.thread.deleteLater)
-        self.thread.start()
+        self.submit_scan(None)
 
     def manual_scan(self):
         directory = QFileDialog.getExistingDirectory(self, self._("select_folder_button"))
         if directory:
+            self.manual_dirs.add(directory)
             self.status_bar.showMessage(self._("status_searching_local"))
             self.btn_scan.setEnabled(False)
             self.search_input.clear()
-            self.thread = QThread()
-            self.worker = Worker(self.scan_logic, manual_dir=directory)
-            self.worker.moveToThread(self.thread)
-            self.thread.started.connect(self.worker.run)
-            self.worker.finished.connect(self.scan_finished)
-            self.worker.finished.connect(self.thread.quit)
-            self.worker.finished.connect(self.worker.deleteLater)
-            self.thread.finished.connect(self.thread.deleteLater)
-            self.thread.start()
-
-    def get_steam_workshop_dirs(self):
-        workshop_dirs = set()
-        base_paths = [
-            os.path.expanduser("~/.local/share/Steam"),
-            os.path.expanduser("~/.steam/steam"),
-            os.path.expanduser("~/.var/app/com.valvesoftware.Steam/.local/share/Steam"),
-            os.path.expanduser("~/.var/app/com.valvesoftware.Steam/.data/Steam"),
-            os.path.expanduser("~/.var/app/com.valvesoftware.Steam/.steam/steam"),
-        ]
-
-        # Library folders from VDF
-        lib_configs = [
-            os.path.expanduser("~/.local/share/Steam/steamapps/libraryfolders.vdf"),
-            os.path.expanduser("~/.steam/steam/steamapps/libraryfolders.vdf"),
-            os.path.expanduser("~/.var/app/com.valvesoftware.Steam/.local/share/Steam/steamapps/libraryfolders.vdf")
-        ]
-
-        for cfg in lib_configs:
-            if os.path.isfile(cfg):
-                try:
-                    with open(cfg, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                        # Simple regex to find paths in VDF
-                        paths = re.findall(r'"path"\s+"([^"]+)"', content)
-                        for p in paths:
-                            if os.path.isdir(p):
-                                base_paths.append(p)
-                except: pass
-
-        # Deduplicate
-        base_paths = list(set(base_paths))
-
-        # Add Snap paths
-        base_paths.extend(glob.glob(os.path.expanduser("~/snap/steam/*/.local/share/Steam")))
-        base_paths.extend(glob.glob(os.path.expanduser("~/snap/steam/*/.steam/steam")))
-
-        for base in base_paths:
-            if not os.path.exists(base): continue
-
-            # Standard workshop path for Wallpaper Engine (ID: 431960)
-            p_workshop = os.path.join(base, "steamapps/workshop/content/431960")
-            if os.path.isdir(p_workshop):
-                workshop_dirs.add(p_workshop)
-
-            # Default assets
-            p_presets = os.path.join(base, "steamapps/common/wallpaper_engine/assets/presets")
-            if os.path.isdir(p_presets):
-                workshop_dirs.add(p_presets)
-
-        # Fallback deep scan if nothing found
-        if not workshop_dirs:
-            try:
-                # Limit search to home directory to avoid scanning whole system
-                search_roots = [os.path.expanduser("~")]
-                cmd = ["find"] + search_roots + ["-maxdepth", "6", "-type", "d", "-name", "431960"]
-                result = subprocess.run(cmd, capture_output=True, text=True, stderr=subprocess.DEVNULL)
-                if result.returncode == 0:
-                    for line in result.stdout.splitlines():
-                        if os.path.isdir(line):
-                            workshop_dirs.add(line)
-            except Exception as e:
-                logging.error(f"Deep scan error: {e}")
-
-        return workshop_dirs
-
-    def scan_logic(self, manual_dir=None):
-        workshop_dirs = self.get_steam_workshop_dirs()
-        is_append = manual_dir is not None
-        if manual_dir:
-            workshop_dirs.add(manual_dir)
-
-        wallpapers = []
-        seen = set()
-
-        for w_dir in workshop_dirs:
-            try:
-                proj_self = os.path.join(w_dir, "project.json")
-                if os.path.isfile(proj_self):
-                    try:
-                        with open(proj_self, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                            item_id = os.path.basename(w_dir)
-                            wallpapers.append({
-                                "title": data.get("title", "Untitled"),
-                                "id": item_id,
-                                "path": w_dir,
-                                "preview": data.get("preview")
-                            })
-                            seen.add(item_id)
-                    except: pass
-                for item_id in os.listdir(w_dir):
-                    if item_id in seen: continue
-                    path = os.path.join(w_dir, item_id)
-                    proj = os.path.join(path, "project.json")
-                    if os.path.isfile(proj):
-                        try:
-                            with open(proj, 'r', encoding='utf-8') as f:
-                                data = json.load(f)
-                                wallpapers.append({
-                                    "title": data.get("title", "Untitled"),
-                                    "id": item_id,
-                                    "path": path,
-                                    "preview": data.get("preview")
-                                })
-                                seen.add(item_id)
-                        except: pass
-            except: pass
-
-        return wallpapers, is_append, list(workshop_dirs)
-
-    def scan_finished(self, result):
-        wallpapers, is_append, scanned_dirs = result
+            self.submit_scan(directory)
+
+    def submit_scan(self, manual_dir):
+        # A newer scan of the same folders replaces the one in progress
+        session = {"items": None, "added": 0, "created": set()}
+        self.scheduler.submit(self.scan_logic, manual_dir=manual_dir, key=("scan", manual_dir),
+                              on_progress=lambda value: self.scan_progress(session, value),
+                              on_result=lambda result: self.scan_finished(result, session),
+                              on_error=self.scan_failed, supersede=True)
+
+    def scan_logic(self, token, manual_dir=None, report=None):
+        if self.config.get("scan_in_subprocess", False):
+            return scan_in_subprocess(manual_dir, token, report)
+        return scan_and_cache_library(manual_dir, token, report)
+
+    def scan_progress(self, session, value):
+        if self.library_released:
+            return
+        if value[0] == "thumbnails":
+            _, paths, done, total = value
+            for path in paths:
+                self.thumbnail_cache.invalidate(path)
+            self.list_wallpapers.viewport().update()
+            self.status_bar.showMessage(self._("status_caching_thumbnails").format(done=done, total=total))
+            return
+        _, batch, found, folders_left = value
+        items = session["items"]
+        if items is None:
+            items = session["items"] = {}
+            for i in range(self.list_wallpapers.count()):
+                item = self.list_wallpapers.item(i)
+                items[item.data(Qt.ItemDataRole.UserRole)["id"]] = item
+        query = self.search_input.text().lower()
+        self.list_wallpapers.setUpdatesEnabled(False)
+        for w in batch:
+            item = items.get(w["id"])
+            if item is not None and item.listWidget() is self.list_wallpapers:
+                if item.text() != w["title"]:
+                    item.setText(w["title"])
+                continue
+            # New cards go to the end; scan_finished sorts them into place
+            item = items[w["id"]] = self.make_wallpaper_item(w)
+            session["created"].add(w["id"])
+            if query or self.facet_selection:
+                item.setHidden(not self.facets.matches(w, query, self.facet_selection))
+            self.list_wallpapers.addItem(item)
+            session["added"] += 1
+        self.list_wallpapers.setUpdatesEnabled(True)
+        self.report_first_card()
+        self.status_bar.showMessage(self._("status_scan_progress").format(count=found, folders=folders_left))
+
+    def scan_failed(self, error):
+        self.btn_scan.setEnabled(not self.scheduler.busy("scan"))
+        self.status_bar.showMessage(f"Scan failed: {error}")
+
+    def start_analysis(self):
+        self.btn_analyze.setEnabled(False)
+        dirs, _ = library.discover_library_dirs()
+        dirs += sorted(self.manual_dirs)
+        workers = self.config.get("analysis_workers")
+        self.scheduler.submit(self.analysis_logic, dirs, int(workers) if workers else None,
+                              key=("analysis", None), priority=TaskScheduler.PRIORITY_IDLE,
+                              on_progress=self.analysis_progress, on_result=self.analysis_finished,
+                              on_error=self.analysis_failed)
+
+    def analysis_logic(self, token, dirs, workers, report=None):
+        with tracing.span("analyze_library", dirs=len(dirs)) as span:
+            result = analyze_library(dirs, token, report, workers)
+            span.set(items=len(result["items"]), duplicates=len(result["duplicates"]))
+        return result
+
+    def analysis_progress(self, value):
+        stage, done, total = value
+        key = "status_analysis_hashing" if stage == "hashing" else "status_analysis_measuring"
+        self.status_bar.showMessage(self._(key).format(done=done, total=total))
+
+    def analysis_failed(self, error):
+        self.btn_analyze.setEnabled(True)
+        self.status_bar.showMessage(f"Analysis failed: {error}")
+
+    def analysis_finished(self, result):
+        self.btn_analyze.setEnabled(True)
+        # Refresh the sizes the grid sorts by
+        changed = False
+        for entry in result["items"]:
+            if self.folder_sizes.get(entry["path"]) != entry["size"]:
+                self.folder_sizes[entry["path"]] = entry["size"]
+                changed = True
+        if changed and self.sorting_type.currentText() == library.SORT_SIZE:
+            self.resort_library()
+        wasted = sum(d["wasted"] for d in result["duplicates"])
+        self.status_bar.showMessage(self._("analysis_summary").format(
+            count=len(result["items"]), total=format_size(result["total"]),
+            groups=len(result["duplicates"]), wasted=format_size(wasted)))
+        if self.analysis_view is None:
+            self.analysis_view = LibraryAnalysisView(self.i18n, self)
+            self.analysis_view.wallpaper_activated.connect(self.select_wallpaper_path)
+        self.analysis_view.set_result(result)
+        self.analysis_view.show()
+        self.analysis_view.raise_()
+        self.analysis_view.activateWindow()
+
+    def select_wallpaper_path(self, path):
+        item = self.find_wallpaper_item(path)
+        if item is None:
+            return
+        if item.isHidden():
+            # Filters would keep it out of sight
+            self.search_input.clear()
+            for combo in self.facet_combos.values():
+                combo.setCurrentIndex(0)
+        self.list_wallpapers.setCurrentItem(item)
+        self.list_wallpapers.scrollToItem(item)
+        self.on_wallpaper_selected(item)
+
+    @tracing.traced("load_cached_library")
+    def load_cached_library(self):
+        wallpapers = load_library_index()
+        if not wallpapers:
+            return
+        self.sort_wallpapers(wallpapers)
+        self.list_wallpapers.setUpdatesEnabled(False)
+        for w in wallpapers:
+            self.list_wallpapers.addItem(self.make_wallpaper_item(w))
+        self.list_wallpapers.setUpdatesEnabled(True)
+        self.refresh_facet_combos()
+        self.apply_filters()
+        self.measure_unsized(wallpapers)
+        self.status_bar.showMessage(self._("status_local_wallpapers_found").format(count=len(wallpapers)))
+        self.report_first_card()
+
+    def report_first_card(self):
+        if self.first_card_reported or not self.list_wallpapers.count():
+            return
+        self.first_card_reported = True
+        # Queued so the time includes the grid's first paint
+        QTimer.singleShot(0, lambda: logging.debug(
+            "Time to first wallpaper card: %.0f ms", (time.perf_counter() - self.startup_time) * 1000))
+
+    def make_wallpaper_item(self, w):
+        item = QListWidgetItem(w["title"])
+        item.setSizeHint(QSize(200, 240))
+        item_font = QFont()
+        item_font.setPointSize(10)
+        item_font.setWeight(700)
+        item.setTextAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignCenter)
+        item.setFont(item_font)
+        self.set_wallpaper_data(item, w)
+        return item
+
+    def set_wallpaper_data(self, item, w):
+        item.setData(Qt.ItemDataRole.UserRole, w)
+        thumb = thumbnail_path(w)
+        # The delegate pulls the pixmap from the thumbnail cache when painting
+        item.setData(THUMBNAIL_ROLE, str(thumb) if thumb is not None else None)
+        problem = w.get("problem")
+        item.setData(PROBLEM_ROLE, problem)
+        item.setToolTip(problem or "")
+        self.facets.add(w)
+        self.wallpaper_items[w["id"]] = item
+
+    @tracing.traced("populate_grid")
+    def scan_finished(self, result, session=None):
+        wallpapers, is_append, scanned_dirs, refreshed = result
+        STARTUP_PROFILE.mark("scan_done")
         if hasattr(self, 'watcher'):
             self.watcher.update_watches(scanned_dirs)
+        if self.library_released:
+            # The index is already saved; the grid is rebuilt from it on show
+            self.btn_scan.setEnabled(not self.scheduler.busy("scan"))
+            return
 
-        if not is_append:
-            self.list_wallpapers.clear()
-        existing_ids = set()
-        for i in range(self.list_wallpapers.count()):
-            data = self.list_wallpapers.item(i).data(Qt.ItemDataRole.UserRole)
-            if data: existing_ids.add(data["id"])
-        new_count = 0
+        # Reconcile the grid in place so cards shown from the cache don't flicker
+        if session and session["items"] is not None:
+            # Reading item data back converts the whole dict, so reuse the
+            # streaming pass's map and skip the cards it just created
+            items = {i: item for i, item in session["items"].items() if item.listWidget() is self.list_wallpapers}
+            created = session["created"]
+        else:
+            items = {}
+            for i in range(self.list_wallpapers.count()):
+                item = self.list_wallpapers.item(i)
+                data = item.data(Qt.ItemDataRole.UserRole)
+                if data: items[data["id"]] = item
+            created = set()
+        current = self.list_wallpapers.currentItem()
+        # Cards added while the scan streamed its results
+        new_count = session["added"] if session else 0
         self.sort_wallpapers(wallpapers)
+        ordered = []
         for w in wallpapers:
-            if w["id"] in existing_ids: continue
-            item = QListWidgetItem(w["title"])
-            item.setSizeHint(QSize(200, 240))
-            item_font = QFont()
-            item_font.setPointSize(10)
-            item_font.setWeight(700)
-            item.setTextAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignCenter)
-            item.setFont(item_font)
-            item.setData(Qt.ItemDataRole.UserRole, w)
-
-            if w.get("preview"):
-                path = os.path.join(w["path"], w["preview"])
-                if os.path.isfile(path):
-                    pixmap = QPixmap(path)
-
-                    icon_pixmap = pixmap.scaled(200, 200, Qt.AspectRatioMode.KeepAspectRatioByExpanding, Qt.TransformationMode.SmoothTransformation)
-
-
-                    rect = QRect(0, 0, 200, 200)
-                    rect.moveCenter(icon_pixmap.rect().center())
-                    icon_pixmap = icon_pixmap.copy(rect)
-
-                    item.setIcon(QIcon(icon_pixmap))
-
-            self.list_wallpapers.addItem(item)
-            existing_ids.add(w["id"])
-            new_count += 1
-        self.btn_scan.setEnabled(True)
+            item = items.pop(w["id"], None)
+            if item is None:
+                item = self.make_wallpaper_item(w)
+                new_count += 1
+            elif is_append:
+                continue
+            else:
+                # Most entries are unchanged; skip rehashing their thumbnail path
+                if w["id"] not in created and item.data(Qt.ItemDataRole.UserRole) != w:
+                    if item.text() != w["title"]:
+                        item.setText(w["title"])
+                    self.set_wallpaper_data(item, w)
+                if session is None and w["id"] in refreshed:
+                    thumb = item.data(THUMBNAIL_ROLE)
+                    if thumb is not None:
+                        self.thumbnail_cache.invalidate(thumb)
+            ordered.append(item)
+
+        self.list_wallpapers.setUpdatesEnabled(False)
+        if is_append:
+            for item in ordered:
+                self.list_wallpapers.addItem(item)
+        else:
+            # Wallpapers that are gone from disk
+            for item_id, item in items.items():
+                self.list_wallpapers.takeItem(self.list_wallpapers.row(item))
+                self.facets.remove(item_id)
+                self.wallpaper_items.pop(item_id, None)
+            self.reorder_grid(ordered, current)
+        self.apply_filters()
+        self.list_wallpapers.setUpdatesEnabled(True)
+        self.refresh_facet_combos()
+        # Repaint cards whose thumbnail was just written
+        self.list_wallpapers.viewport().update()
+        self.report_first_card()
+        self.measure_unsized(wallpapers)
+        self.btn_scan.setEnabled(not self.scheduler.busy("scan"))
         if is_append:
             self.status_bar.showMessage(f"Added {new_count} new wallpapers.")
         else:
             self.status_bar.showMessage(self._("status_local_wallpapers_found").format(count=self.list_wallpapers.count()))
 
+    def reorder_grid(self, ordered, current=None):
+        """Put the grid's items in the order of ``ordered`` (the same items)."""
+        in_place = self.list_wallpapers.count() == len(ordered) and all(
+            self.list_wallpapers.item(i) is item for i, item in enumerate(ordered))
+        if in_place:
+            return
+        # Take from the end so each removal is cheap, then re-add in order
+        for i in range(self.list_wallpapers.count() - 1, -1, -1):
+            self.list_wallpapers.takeItem(i)
+        for item in ordered:
+            self.list_wallpapers.addItem(item)
+        if current is not None and current.listWidget() is self.list_wallpapers:
+            self.list_wallpapers.setCurrentItem(current)
+
     def on_wallpaper_selected(self, item):
         data = item.data(Qt.ItemDataRole.UserRole)
         self.wp_id_input.setText(data["id"])
+        self.prewarm_wallpapers(item)
+
+    def prewarm_wallpapers(self, item):
+        # Start reading the wallpaper's files while the user decides, so the
+        # backend doesn't wait on the disk when it's launched. Optionally the
+        # next few visible cards are prewarmed too.
+        wallpapers = [item.data(Qt.ItemDataRole.UserRole)]
+        extra = int(self.config.get("prewarm_next", 0))
+        row = self.list_wallpapers.row(item) + 1
+        while len(wallpapers) <= extra and row < self.list_wallpapers.count():
+            next_item = self.list_wallpapers.item(row)
+            if not next_item.isHidden():
+                wallpapers.append(next_item.data(Qt.ItemDataRole.UserRole))
+            row += 1
+        max_bytes = int(self.config.get("prewarm_max_mb", 256)) * 1024 * 1024
+        if max_bytes > 0:
+            self.scheduler.submit(self.prewarm_logic, wallpapers, max_bytes, key=("prewarm", None),
+                                  priority=TaskScheduler.PRIORITY_IDLE, supersede=True)
+
+    def prewarm_logic(self, token, wallpapers, max_bytes):
+        for w in wallpapers:
+            token.check()
+            with tracing.span("prewarm", path=w["path"]) as span:
+                requested = prewarm_files(wallpaper_files(w), max_bytes)
+                span.set(bytes=requested)
+            logging.debug("Prewarming %.1f MB of %s", requested / 2**20, w["path"])
 
     def filter_wallpapers(self, text):
         query = text.lower()
@@ -796,55 +1663,116 @@ class WallpaperApp(QMainWindow):
         else:
             self.watcher.timer.start()
 
-        for i in range(self.list_wallpapers.count()):
-            item = self.list_wallpapers.item(i)
-            data = item.data(Qt.ItemDataRole.UserRole)
-            title = item.text().lower()
-            wp_id = str(data.get("id", "")).lower()
-            item.setHidden(query not in title and query not in wp_id)
+        self.apply_filters()
+
+    def apply_filters(self):
+        # The facet index answers with a set of ids, so only cards whose
+        # visibility changes are touched
+        matching = self.facets.matching(self.search_input.text().lower(), self.facet_selection)
+        for item_id, item in self.wallpaper_items.items():
+            hidden = matching is not None and item_id not in matching
+            if item.isHidden() != hidden:
+                item.setHidden(hidden)
+
+    def facet_label(self, facet, value):
+        if value is None:
+            return self._("facet_unknown")
+        return value.capitalize() if facet == library.FACET_TYPE else value
+
+    def refresh_facet_combos(self):
+        """Fill the facet filters with the values in the library and their counts."""
+        all_keys = {library.FACET_TYPE: "facet_all_types", library.FACET_RATING: "facet_all_ratings",
+                    library.FACET_TAG: "facet_all_tags", library.FACET_RESOLUTION: "facet_all_resolutions"}
+        resolution_order = [name for name, _ in library.RESOLUTION_CLASSES]
+        for facet, combo in self.facet_combos.items():
+            counts = self.facets.counts(facet)
+            is_selected = facet in self.facet_selection
+            selected = self.facet_selection.get(facet)
+            if is_selected and selected not in counts:
+                # Keep a saved choice until the scan has found its wallpapers
+                counts[selected] = 0
+            if facet == library.FACET_RESOLUTION:
+                values = sorted(counts, key=lambda v: resolution_order.index(v) if v in resolution_order else len(resolution_order))
+            else:
+                values = sorted(counts, key=lambda v: (v is None, -counts[v], str(v).lower()))
+            self.facet_options[facet] = values
+            combo.blockSignals(True)
+            combo.clear()
+            combo.addItem(self._(all_keys[facet]))
+            for value in values:
+                combo.addItem(f"{self.facet_label(facet, value)} ({counts[value]})")
+            combo.setCurrentIndex(values.index(selected) + 1 if is_selected else 0)
+            combo.blockSignals(False)
+
+    def on_facet_change(self, facet, index):
+        if index > 0:
+            self.facet_selection[facet] = self.facet_options[facet][index - 1]
+        else:
+            self.facet_selection.pop(facet, None)
+        self.config["facet_filters"] = self.facet_selection
+        self.save_config()
+        self.apply_filters()
     
     def on_sort_change(self):
+        # Save sorting type to config
+        self.config["sorting_type"] = self.sorting_type.currentText()
+        self.save_config()
+        self.resort_library()
+
+    def resort_library(self):
+        # The sort key may stat every wallpaper folder, so order a copy of the
+        # grid's data off the GUI thread and move the items when it's done
+        wallpapers = [self.list_wallpapers.item(i).data(Qt.ItemDataRole.UserRole)
+                      for i in range(self.list_wallpapers.count())]
+        if not wallpapers:
+            return
+        self.scheduler.submit(self.sort_logic, wallpapers, self.sorting_type.currentText(),
+                              self.sort_reversed_state, dict(self.folder_sizes), key=("sort", None),
+                              priority=TaskScheduler.PRIORITY_UI, on_result=self.sort_finished,
+                              supersede=True)
+
+    def sort_logic(self, token, wallpapers, mode, reverse, sizes):
+        if mode == library.SORT_SIZE:
+            # Only folders not measured yet are walked
+            for w in wallpapers:
+                if w["path"] not in sizes:
+                    token.check()
+                    sizes[w["path"]] = disk_usage(w["path"])
         try:
-            # Save sorting type to config
-            self.config["sorting_type"] = self.sorting_type.currentText()
-            self.save_config()
-
-            if self.list_wallpapers:
-                wallpapers = self.list_wallpapers
-
-            if wallpapers:
-                self.thread = QThread()
-                self.worker = Worker(self.sort_wallpapers, wallpapers)
-                self.worker.moveToThread(self.thread)
-                self.thread.started.connect(self.worker.run)
-                self.worker.finished.connect(self.thread.quit)
-                self.thread.finished.connect(self.worker.deleteLater)
-                self.watcher.library_changed.emit()
-                self.thread.start()
-
-        except FileNotFoundError:
-            return 0
-
-        except Exception as e:
-            print(f"Error of type {e}")
-            return 0
+            library.sort_wallpapers(wallpapers, mode, reverse, sizes)
+        except OSError as e:
+            logging.info("Failed to sort wallpapers: %s", e)
+            return None
+        return [w["id"] for w in wallpapers], sizes
 
+    def sort_finished(self, result):
+        if result is None:
+            return
+        ids, sizes = result
+        self.folder_sizes.update(sizes)
+        items = {}
+        for i in range(self.list_wallpapers.count()):
+            item = self.list_wallpapers.item(i)
+            items[item.data(Qt.ItemDataRole.UserRole)["id"]] = item
+        ordered = [items.pop(i) for i in ids if i in items]
+        # Items a scan added since the sort started keep their place at the end
+        ordered.extend(items.values())
+        self.list_wallpapers.setUpdatesEnabled(False)
+        self.reorder_grid(ordered, self.list_wallpapers.currentItem())
+        self.list_wallpapers.setUpdatesEnabled(True)
+
+
+    def measure_unsized(self, wallpapers):
+        # Sorting by size on the GUI thread only uses known sizes; measure
+        # the rest with the next resort
+        if self.sorting_type.currentText() == library.SORT_SIZE and any(
+                w["path"] not in self.folder_sizes for w in wallpapers):
+            self.resort_library()
 
     def sort_wallpapers(self, wallpapers):
         try:
-
-            if self.sorting_type.currentText() == "Name":
-                if not self.sort_reversed_state:
-                    wallpapers.sort(key=lambda x: x["title"].lower())
-                else:
-                    wallpapers.sort(key=lambda x: x["title"].lower(), reverse=True)
-
-            elif self.sorting_type.currentText() == "Subscription Date":
-                if not self.sort_reversed_state:
-                    # By default needs to be reversed to get the latest subscriptions
-                    wallpapers.sort(key=lambda x: pathlib.Path(x["path"]).stat().st_ctime, reverse=True)
-                else:
-                    wallpapers.sort(key=lambda x: pathlib.Path(x["path"]).stat().st_ctime, reverse=False)
+            library.sort_wallpapers(wallpapers, self.sorting_type.currentText(), self.sort_reversed_state,
+                                    self.folder_sizes)
         except FileNotFoundError:
             return 0
 
@@ -862,7 +1790,7 @@ class WallpaperApp(QMainWindow):
 
         self.config["reversed"] = self.sort_reversed_state
         self.save_config()
-        self.watcher.library_changed.emit()
+        self.resort_library()
 
     def on_property_selected(self):
         data = self.properties_combo.currentData()
@@ -910,109 +1838,23 @@ class WallpaperApp(QMainWindow):
         self.properties_combo.blockSignals(False)
         self.on_property_selected()
 
-    def normalize_property_value(self, value):
-        if "," in value:
-            value = re.sub(r"\s*,\s*", ",", value)
-        return value
-
-    def parse_properties_output(self, output):
-        props = []
-
-        text = output.strip()
-        if text:
-            try:
-                parsed = json.loads(text)
-            except Exception:
-                parsed = None
-
-            if parsed is None:
-                start = text.find("{")
-                end = text.rfind("}")
-                if start != -1 and end != -1 and end > start:
-                    try:
-                        parsed = json.loads(text[start:end + 1])
-                    except Exception:
-                        parsed = None
-
-            if isinstance(parsed, dict):
-                for name, value in parsed.items():
-                    props.append((str(name), str(value), "=", ""))
-                return props
-            if isinstance(parsed, list):
-                for item in parsed:
-                    if isinstance(item, dict):
-                        name = item.get("name") or item.get("property") or item.get("key")
-                        if name is None:
-                            continue
-                        value = item.get("value", "")
-                        props.append((str(name), str(value), "=", ""))
-                    elif isinstance(item, str):
-                        props.append((item, "", "=", ""))
-                if props:
-                    return props
-
-        lines = output.splitlines()
-        current_name = None
-        current_type = ""
-        for line in lines:
-            stripped = line.strip()
-            if not stripped:
-                continue
-            if stripped.startswith("_") or " - " in stripped:
-                parts = stripped.split(" - ", 1)
-                if parts:
-                    current_name = parts[0].strip()
-                    current_type = parts[1].strip() if len(parts) > 1 else ""
-                continue
-            if stripped.startswith("Value:"):
-                if current_name:
-                    value = stripped.split("Value:", 1)[1].strip()
-                    props.append((current_name, value, "=", current_type))
-                    current_name = None
-                    current_type = ""
-                continue
-
-        if props:
-            return props
-
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            lower = line.lower()
-            if lower.startswith("properties") or line.startswith("#"):
-                continue
-            if lower.startswith("running with") or lower.startswith("particle "):
-                continue
-            if lower.startswith("found user setting with script value"):
-                continue
-            if "=" in line:
-                name, value = line.split("=", 1)
-                sep = "="
-            elif ":" in line:
-                name, value = line.split(":", 1)
-                sep = ":"
-            else:
-                parts = line.split(None, 1)
-                name = parts[0]
-                value = parts[1] if len(parts) > 1 else ""
-                sep = "="
-            name = name.strip()
-            value = value.strip()
-            if name:
-                props.append((name, value, sep, ""))
-        return props
-
-    def list_properties_logic(self, wallpaper_id):
+    def list_properties_logic(self, token, wallpaper_id):
         cmd = ["linux-wallpaperengine", "-l", wallpaper_id]
         proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
         timed_out = False
-        try:
-            stdout, stderr = proc.communicate(timeout=5)
-        except subprocess.TimeoutExpired:
-            timed_out = True
-            proc.terminate()
-            stdout, stderr = proc.communicate(timeout=2)
+        deadline = time.monotonic() + 5
+        while True:
+            try:
+                # Short waits so a newer request can cancel this one
+                stdout, stderr = proc.communicate(timeout=0.25)
+                break
+            except subprocess.TimeoutExpired:
+                if token.cancelled or time.monotonic() >= deadline:
+                    timed_out = True
+                    proc.terminate()
+                    stdout, stderr = proc.communicate(timeout=2)
+                    break
+        token.check()
         returncode = proc.returncode if proc.returncode is not None else 0
         combined = (stdout or "")
         if stderr:
@@ -1029,15 +1871,9 @@ class WallpaperApp(QMainWindow):
             return
         self.status_bar.showMessage(self._("status_loading_properties"))
         self.btn_load_props.setEnabled(False)
-        self.props_thread = QThread()
-        self.props_worker = Worker(self.list_properties_logic, wallpaper_id)
-        self.props_worker.moveToThread(self.props_thread)
-        self.props_thread.started.connect(self.props_worker.run)
-        self.props_worker.finished.connect(self.load_properties_finished)
-        self.props_worker.finished.connect(self.props_thread.quit)
-        self.props_worker.finished.connect(self.props_worker.deleteLater)
-        self.props_thread.finished.connect(self.props_thread.deleteLater)
-        self.props_thread.start()
+        self.scheduler.submit(self.list_properties_logic, wallpaper_id, key=("properties", None),
+                              priority=TaskScheduler.PRIORITY_UI, on_result=self.load_properties_finished,
+                              on_error=lambda e: self.btn_load_props.setEnabled(True), supersede=True)
 
     def load_properties_finished(self, result):
         returncode, stdout, stderr, timed_out, wallpaper_id = result
@@ -1046,8 +1882,8 @@ class WallpaperApp(QMainWindow):
             msg = stderr.strip() or "Unknown error"
             self.status_bar.showMessage(self._("status_properties_load_failed").format(error=msg))
             return
-        props = self.parse_properties_output(stdout)
-        stored = self.config.get("properties_by_wallpaper", {}).get(wallpaper_id, {})
+        props = parse_properties_output(stdout)
+        stored = self.wallpaper_settings.properties(wallpaper_id)
         merged = {}
         for name, value, sep, prop_type in props:
             data = {"name": name, "value": value, "sep": sep, "type": prop_type}
@@ -1066,8 +1902,8 @@ class WallpaperApp(QMainWindow):
             else:
                 self.status_bar.showMessage(self._("status_properties_none"))
 
-    def kill_external_wallpapers(self):
-        self.wallpaper_proc_manager.kill_external("linux-wallpaperengine")
+    def kill_orphaned_wallpapers(self):
+        self.wallpaper_proc_manager.kill_orphans()
 
     def run_wallpaper(self):
         if not shutil.which("linux-wallpaperengine"):
@@ -1078,74 +1914,204 @@ class WallpaperApp(QMainWindow):
             self.status_bar.showMessage("Error: linux-wallpaperengine not found")
             return
 
-        cmd = ['linux-wallpaperengine']
-        screen_name = self.screen_combo.currentText()
-
-        if self.chk_windowed_mode.isChecked():
-            geom = "0x0x1920x1080"
-            found = next((s for s in self.screens if s["name"] == screen_name), None)
-            if found:
-                geom = f"{found['x']}x{found['y']}x{found['w']}x{found['h']}"
-            cmd.extend(['--window', geom])
-        else:
-            cmd.extend(['--screen-root', screen_name])
-
-        cmd.extend(['--bg', self.wp_id_input.text()])
-        if self.chk_silent.isChecked(): cmd.append('--silent')
-        elif self.slider_volume.value() != 15: cmd.extend(['--volume', str(self.slider_volume.value())])
-        if self.chk_no_automute.isChecked(): cmd.append('--noautomute')
-        if self.chk_no_proc.isChecked(): cmd.append('--no-audio-processing')
-        if self.slider_fps.value() != 30: cmd.extend(['--fps', str(self.slider_fps.value())])
-        if self.chk_mouse.isChecked(): cmd.append('--disable-mouse')
-        if self.chk_parallax.isChecked(): cmd.append('--disable-parallax')
-        if self.chk_fs_pause.isChecked(): cmd.append('--no-fullscreen-pause')
-        scale = self.combo_scaling.currentText()
-        self.config["scale"] = scale
-        if scale != 'default': cmd.extend(['--scaling', scale])
-        clamp = self.combo_clamp.currentText()
-        self.config["clamp"] = clamp
-        if clamp != 'clamp': cmd.extend(['--clamp', clamp])
-        if hasattr(self, "properties_data"):
-            for name, data in self.properties_data.items():
-                value = self.normalize_property_value(str(data.get("value", "")))
-                sep = data.get("sep", "=")
-                cmd.extend(['--set-property', f"{name}{sep}{value}"])
-        custom_args = self.input_custom_args.text()
-        if custom_args:
-             for arg in custom_args.split(): cmd.append(arg)
-        self.stop_wallpapers()
+        settings = self.current_wallpaper_settings()
+        if not self.preflight_wallpaper(settings["background_id"].strip()):
+            return
+        self.config["scale"] = settings["scale"]
+        self.config["clamp"] = settings["clamp"]
         try:
-            self.wallpaper_proc_manager.start(cmd)
+            self.launch_wallpaper(settings, self.properties_data, self.launch_options())
             self.status_bar.showMessage(self._("status_command_launched"))
             self.save_config()
         except Exception as e:
             logging.error("Couldn't run with error %s", e)
             self.status_bar.showMessage(f"Error: {e}")
 
-    def show_log_file(self):
-        log_path = self.wallpaper_proc_manager.log_path()
-        if not log_path.exists():
-            self.status_bar.showMessage("Log file not found.")
+    def find_wallpaper_item(self, wallpaper_id):
+        """The grid item for a workshop id or wallpaper folder path, or None."""
+        item = self.wallpaper_items.get(wallpaper_id)
+        if item is not None:
+            return item
+        # A folder is named after its id; another copy of the same id doesn't count
+        item = self.wallpaper_items.get(os.path.basename(os.path.normpath(wallpaper_id)))
+        if item is not None and item.data(Qt.ItemDataRole.UserRole)["path"] == wallpaper_id:
+            return item
+        return None
+
+    def preflight_wallpaper(self, wallpaper_id):
+        """Check the wallpaper's files before the running one is stopped; False if it's broken."""
+        item = self.find_wallpaper_item(wallpaper_id)
+        if item is not None:
+            path = item.data(Qt.ItemDataRole.UserRole)["path"]
+        else:
+            path = wallpaper_id if os.path.isdir(wallpaper_id) else None
+        if path is None:
+            # Not in the library; the backend resolves the id itself
+            return True
+        with tracing.span("preflight", path=path):
+            problem = check_wallpaper(path)
+        if item is not None and problem != item.data(PROBLEM_ROLE):
+            # The files changed since the last scan
+            data = dict(item.data(Qt.ItemDataRole.UserRole))
+            data.pop("problem", None)
+            if problem:
+                data["problem"] = problem
+            self.set_wallpaper_data(item, data)
+        if problem:
+            title = item.text() if item is not None else wallpaper_id
+            logging.error("Refusing to start %s: %s", path, problem)
+            self.status_bar.showMessage(self._("status_wallpaper_broken").format(title=title, problem=problem))
+            return False
+        return True
+
+    @tracing.traced("launch_wallpaper")
+    def launch_wallpaper(self, settings, properties, options):
+        """Start a wallpaper through the daemon if one is running, else locally."""
+        geometry = self.screen_geometry(settings["screen"]) if settings.get("windowed_mode") else None
+
+        # A running daemon owns the backend; hand the launch to it
+        reply = self.send_daemon_request({
+            "cmd": "set",
+            "settings": settings,
+            "properties": properties,
+            "options": options,
+            "geometry": geometry,
+        })
+        if reply is not None:
+            if not reply.get("ok"):
+                raise RuntimeError(reply.get("error"))
             return
-        QDesktopServices.openUrl(QUrl.fromLocalFile(str(log_path)))
+
+        cmd = build_wallpaper_command(settings, properties, geometry)
+        if not self.wallpaper_proc_manager.is_running():
+            self.kill_orphaned_wallpapers()
+        # Queued behind the old process' stop, which finishes in the background
+        self.wallpaper_proc_manager.restart(cmd, options)
+
+    def restore_wallpaper_fast(self):
+        """Relaunch the last wallpaper straight from the config, without any UI."""
+        c = self.config.get("last_wallpaper", {})
+        wallpaper_id = str(c.get("background_id", "")).strip()
+        if not wallpaper_id:
+            return
+        status = self.send_daemon_request({"cmd": "status"})
+        if status is not None and status.get("running"):
+            return
+        if status is None and not shutil.which("linux-wallpaperengine"):
+            logging.error("linux-wallpaperengine not found, can't restore wallpaper")
+            return
+        settings = dict(c)
+        settings["scale"] = self.config.get("scale", "default")
+        settings["clamp"] = self.config.get("clamp", "clamp")
+        try:
+            self.launch_wallpaper(
+                settings,
+                self.wallpaper_settings.properties(wallpaper_id),
+                self.wallpaper_settings.launch_options(wallpaper_id),
+            )
+        except Exception as e:
+            logging.error("Couldn't restore wallpaper with error %s", e)
+
+    def screen_geometry(self, screen_name):
+        if self.screens is None:
+            self.screens = self.detect_screens()
+        found = next((s for s in self.screens if s["name"] == screen_name), None)
+        if found:
+            return f"{found['x']}x{found['y']}x{found['w']}x{found['h']}"
+        return None
+
+    def current_wallpaper_settings(self):
+        return {
+            "background_id": self.wp_id_input.text(),
+            "screen": self.screen_combo.currentText(),
+            "silent": self.chk_silent.isChecked(),
+            "volume": self.slider_volume.value(),
+            "noautomute": self.chk_no_automute.isChecked(),
+            "no-audio-processing": self.chk_no_proc.isChecked(),
+            "fps": self.slider_fps.value(),
+            "disable-mouse": self.chk_mouse.isChecked(),
+            "disable-parallax": self.chk_parallax.isChecked(),
+            "no-fullscreen-pause": self.chk_fs_pause.isChecked(),
+            "custom_args": self.input_custom_args.text(),
+            "windowed_mode": self.chk_windowed_mode.isChecked(),
+            "scale": self.combo_scaling.currentText(),
+            "clamp": self.combo_clamp.currentText(),
+        }
+
+    def send_daemon_request(self, request):
+        """Send a request to the wallpaper daemon; None when it isn't running."""
+        try:
+            return ipc.send_request(ipc.DAEMON_SOCKET, request)
+        except OSError:
+            return None
+        except ValueError as e:
+            logging.error("Bad reply from wallpaper daemon: %s", e)
+            return None
+
+    def launch_options(self):
+        memory_limit = self.input_memory_limit.text().strip()
+        return {
+            "nice": self.slider_nice.value(),
+            "io_class": self.combo_io_class.currentText(),
+            "cpu_affinity": self.input_cpu_affinity.text().strip(),
+            "memory_limit_mb": int(memory_limit) if memory_limit else 0,
+        }
+
+    def apply_launch_options(self, options):
+        options = normalize_launch_options(options)
+        widgets = (self.slider_nice, self.combo_io_class, self.input_cpu_affinity, self.input_memory_limit)
+        for widget in widgets:
+            widget.blockSignals(True)
+        self.slider_nice.setValue(int(options["nice"]))
+        self.combo_io_class.setCurrentText(options["io_class"])
+        self.input_cpu_affinity.setText(options["cpu_affinity"])
+        self.input_memory_limit.setText(str(options["memory_limit_mb"]) if options["memory_limit_mb"] else "")
+        for widget in widgets:
+            widget.blockSignals(False)
+
+    def on_launch_option_edited(self):
+        # editingFinished also fires on focus loss; only relaunch on real edits
+        widget = self.sender()
+        if widget.isModified():
+            widget.setModified(False)
+            self.run_wallpaper()
+
+    def show_log_file(self):
+        if self.log_viewer is None:
+            self.log_viewer = LogViewer(self.wallpaper_proc_manager, self.i18n, self)
+        self.log_viewer.show()
+        self.log_viewer.raise_()
+        self.log_viewer.activateWindow()
 
     def stop_wallpapers(self):
-        stopped_internal = False
-        if self.wallpaper_proc_manager.is_running():
-            try:
-                stopped_internal = self.wallpaper_proc_manager.stop(timeout=1)
-            except Exception as e:
-                logging.error("Couldn't stop internal wallpaper process: %s", e)
+        reply = self.send_daemon_request({"cmd": "stop"})
+        if reply is not None:
+            self.status_bar.showMessage(self._("status_all_stopped"))
+            return
+        stopping_internal = False
+        try:
+            stopping_internal = self.wallpaper_proc_manager.stop_async(timeout=1)
+        except Exception as e:
+            logging.error("Couldn't stop internal wallpaper process: %s", e)
 
         # Fallback: If we didn't stop a child process (e.g. GUI restarted),
-        # ensure we clean up any orphaned linux-wallpaperengine processes.
+        # clean up the backends a previous session launched and left behind.
         # This restores the "force stop" capability users expect.
-        if not stopped_internal:
-            self.kill_external_wallpapers()
+        # Otherwise on_wallpaper_stopped reports once the process is gone.
+        if not stopping_internal:
+            self.kill_orphaned_wallpapers()
             self.status_bar.showMessage(self._("status_all_stopped"))
-        else:
+
+    def on_wallpaper_stopped(self, stopped):
+        if not stopped:
+            logging.error("Wallpaper process did not exit after kill")
+        # A restart queues the next launch; don't report "stopped" over it
+        if not self.wallpaper_proc_manager.is_running():
             self.status_bar.showMessage(self._("status_all_stopped"))
 
+    def on_wallpaper_start_failed(self, error):
+        self.status_bar.showMessage(f"Error: {error}")
+
     def check_wallpaper_process(self):
         result = self.wallpaper_proc_manager.check()
         if result is None:
@@ -1163,7 +2129,7 @@ class WallpaperApp(QMainWindow):
         if hasattr(self, "tray") and self.tray.isVisible():
             self.tray.showMessage("Wallpaper Engine", msg)
 
-    def restore_last_wallpaper(self):
+    def restore_last_wallpaper(self, launch=True):
         c = self.config.get("last_wallpaper", {})
         if not c: return
         self.wp_id_input.setText(c.get("background_id", ""))
@@ -1178,7 +2144,10 @@ class WallpaperApp(QMainWindow):
         self.chk_fs_pause.setChecked(c.get("no-fullscreen-pause", False))
         self.input_custom_args.setText(c.get("custom_args", ""))
         self.chk_windowed_mode.setChecked(c.get("windowed_mode", False))
-        self.run_wallpaper()
+        # Attach to a daemon that already shows a wallpaper instead of restarting it
+        status = self.send_daemon_request({"cmd": "status"}) if launch else None
+        if launch and (status is None or not status.get("running")):
+            self.run_wallpaper()
         # Library Settings
         self.sorting_type.setCurrentText(self.config.get("sorting_type", "name"))
         self.sort_reversed_state = self.config.get("reversed", False)
@@ -1227,38 +2196,25 @@ class WallpaperApp(QMainWindow):
             except Exception as e:
                 logging.error(f"Migration failed: {e}")
 
-        if os.path.exists(CONFIG_FILE):
-            logging.info("Attempting to read config from: %s", CONFIG_FILE)
-            try:
-                with open(CONFIG_FILE, 'r') as f: self.config = json.load(f)
-            except Exception as e:
-                logging.info("Failed to open config with error %s", e)
-        if "properties_by_wallpaper" not in self.config:
-            self.config["properties_by_wallpaper"] = {}
+        self.config = read_config(CONFIG_FILE)
+        # Per-wallpaper settings used to live in the config file itself
+        self.wallpaper_settings = WallpaperSettingsStore(legacy=self.config)
+        if self.wallpaper_settings.migrate_from_config(self.config):
+            self.config_store.save(self.config)
 
     def apply_config_ui(self):
         pass
 
     def on_wallpaper_id_changed(self):
         wallpaper_id = self.wp_id_input.text().strip()
-        stored = self.config.get("properties_by_wallpaper", {}).get(wallpaper_id, {})
-        self.populate_properties_combo(stored)
+        self.populate_properties_combo(self.wallpaper_settings.properties(wallpaper_id))
+        self.apply_launch_options(self.wallpaper_settings.launch_options(wallpaper_id) or DEFAULT_LAUNCH_OPTIONS)
 
     def save_config(self):
-        self.config["last_wallpaper"] = {
-            "background_id": self.wp_id_input.text(),
-            "screen": self.screen_combo.currentText(),
-            "silent": self.chk_silent.isChecked(),
-            "volume": self.slider_volume.value(),
-            "noautomute": self.chk_no_automute.isChecked(),
-            "no-audio-processing": self.chk_no_proc.isChecked(),
-            "fps": self.slider_fps.value(),
-            "disable-mouse": self.chk_mouse.isChecked(),
-            "disable-parallax": self.chk_parallax.isChecked(),
-            "no-fullscreen-pause": self.chk_fs_pause.isChecked(),
-            "custom_args": self.input_custom_args.text(),
-            "windowed_mode": self.chk_windowed_mode.isChecked(),
-        }
+        settings = self.current_wallpaper_settings()
+        # scale/clamp live at the top level of the config
+        del settings["scale"], settings["clamp"]
+        self.config["last_wallpaper"] = settings
         wallpaper_id = self.wp_id_input.text().strip()
         if wallpaper_id:
             props_out = {}
@@ -1268,12 +2224,9 @@ class WallpaperApp(QMainWindow):
                     "sep": data.get("sep", "="),
                     "type": data.get("type", ""),
                 }
-            self.config.setdefault("properties_by_wallpaper", {})[wallpaper_id] = props_out
-        try:
-            CONFIG_FILE.parent.mkdir(parents=True, exist_ok=True)
-            with open(CONFIG_FILE, 'w') as f: json.dump(self.config, f, indent=4)
-        except Exception as e:
-            logging.error("Couldn't save config with error %s", e)
+            self.wallpaper_settings.save(wallpaper_id, props_out, self.launch_options())
+        # Written on a background thread after a short quiet period
+        self.config_store.save(self.config)
 
     def setup_tray(self):
         self.tray = QSystemTrayIcon(QApplication.instance())
@@ -1291,7 +2244,7 @@ class WallpaperApp(QMainWindow):
 
         self.tray_menu = QMenu()
         a_show = QAction(self._("show_window_tray_menu"), self)
-        a_show.triggered.connect(self.show)
+        a_show.triggered.connect(self.show_window)
         a_exit = QAction(self._("exit_tray_menu"), self)
         a_exit.triggered.connect(self.quit_app)
         self.tray_menu.addAction(a_show)
@@ -1300,6 +2253,36 @@ class WallpaperApp(QMainWindow):
         self.tray.setContextMenu(self.tray_menu)
         self.tray.show()
 
+    def enable_memory_profiling(self):
+        from memory_profile import MemoryProfiler
+
+        self.memory_profiler = MemoryProfiler()
+        self.memory_profiler.start()
+        self.signal_notifier = UnixSignalNotifier([signal.SIGUSR1], self)
+        self.signal_notifier.received.connect(lambda _: self.memory_profiler.snapshot(self.memory_counts()))
+
+    def memory_counts(self):
+        objects = gc.get_objects()
+        cache_stats = self.thumbnail_cache.stats()
+        counts = {
+            "python_objects": len(objects),
+            "QListWidgetItem wrappers": sum(isinstance(o, QListWidgetItem) for o in objects),
+            "thumbnail cache entries": cache_stats["entries"],
+            "thumbnail cache bytes": cache_stats["bytes"],
+        }
+        del objects
+        if self.ui_ready:
+            delegate = self.list_wallpapers.itemDelegate()
+            counts["grid items"] = self.list_wallpapers.count()
+            counts["delegate scales"] = len(delegate.scales)
+            counts["delegate current_scales"] = len(delegate.current_scales)
+        return counts
+
+    def on_instance_request(self, request):
+        # Another launch of the app forwarded its arguments to us
+        if request.get("cmd") == "activate" and not request.get("background"):
+            self.show_window()
+
     def closeEvent(self, event):
         if self.tray.isVisible():
             self.hide()
@@ -1309,24 +2292,40 @@ class WallpaperApp(QMainWindow):
 
     def quit_app(self):
         logging.info("Exiting application...")
-        self.stop_wallpapers()
+        self.hide()
+        self.tray.hide()
+        # With a daemon running the wallpaper outlives the GUI
+        if not ipc.is_listening(ipc.DAEMON_SOCKET):
+            self.stop_wallpapers()
         if hasattr(self, 'watcher'):
             self.watcher.stop()
+        self.instance_server.close()
+        self.scheduler.shutdown()
+        self.config_store.flush()
 
-        # Force kill any remaining backend processes to ensure clean exit
-        self.kill_external_wallpapers()
+        # Clean up backends left over from earlier sessions to ensure clean exit
+        self.kill_orphaned_wallpapers()
 
-        QApplication.quit()
+        # Leave the event loop once the background stop has finished.
+        # Connect first so a stop completing in between can't be missed.
+        self.proc_signals.stopped.connect(lambda _: QApplication.quit())
+        if not self.wallpaper_proc_manager.is_stopping():
+            QApplication.quit()
 
 if __name__ == "__main__":
     logging.basicConfig(format='[%(asctime)s] [%(levelname)s]:  %(message)s')
+    args = ARGS
+    if args.debug:
+        logging.getLogger().setLevel(logging.DEBUG)
+    STARTUP_PROFILE.enabled = args.profile_startup
+    if args.trace:
+        tracing.enable(args.trace)
     app = QApplication(sys.argv)
     app.setQuitOnLastWindowClosed(False)
     app.setStyle("Fusion")
-    window = WallpaperApp()
-    parser = argparse.ArgumentParser(description="A simple gui for linux-wallpaperengine")
-    parser.add_argument("--background", action="store_true", help="Start the GUI minimized to the tray")
-    args = parser.parse_args()
+    window = WallpaperApp(background=args.background)
+    if args.memory_profile:
+        window.enable_memory_profiling()
     if not args.background:
         window.show()
     sys.exit(app.exec())